@@ -1,37 +1,170 @@
 import csv
+import json
 import os
 import time
 import logging
-import yfinance as yf
-from flask import Flask, request, jsonify
+import sys
+import threading
+from datetime import datetime
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from newsapi import NewsApiClient
-from newsapi.newsapi_exception import NewsAPIException
-from sentiment_analysis import SentimentAnalysis
-from bot import query_rag
-from chromadb import PersistentClient
-import random  # Import random for better variation
+from inference_server import inference_server
+from model_registry import registry
+from sentiment_cache import sentiment_cache
+from news_fetcher import NewsFetcher
+from metrics import finish_profile, metrics, start_profile
+
+# torch/transformers, langchain/chromadb, pandas, yfinance and newsapi are imported on first use
+# inside the routes that need them, so the app starts fast and quote-only deployments never load them.
+# The SQLite-backed stores are opened the same way, so importing the app creates no files.
 
 app = Flask(__name__)
 CORS(app)  # Allow Cross-Origin Requests
 
 COLLECTION_NAME = "stock_news"
+MAX_BATCH_SYMBOLS = 100
+NEWS_SORT_ORDERS = ["publishedAt", "relevancy"]
 
-# Load API Key
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-if not NEWS_API_KEY:
-    raise ValueError("NEWS_API_KEY environment variable not set.")
-
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+_news_fetcher = None
+_news_fetcher_lock = threading.Lock()
+_market_data = None
+_news_store = None
+_stores_lock = threading.Lock()
 
 logging.basicConfig(level=logging.INFO)
 
 
+def get_news_fetcher():
+    """Creates the NewsAPI client on first use, so only the news routes need NEWS_API_KEY."""
+    global _news_fetcher
+    with _news_fetcher_lock:
+        if _news_fetcher is None:
+            api_key = os.getenv("NEWS_API_KEY")
+            if not api_key:
+                raise ValueError("NEWS_API_KEY environment variable not set.")
+
+            from newsapi import NewsApiClient
+
+            _news_fetcher = NewsFetcher(
+                NewsApiClient(api_key=api_key), ttl_seconds=int(os.getenv("NEWS_CACHE_TTL_SECONDS", 300))
+            )
+    return _news_fetcher
+
+
+def get_market_data():
+    """Opens the quote/bar cache and its SQLite database on first use."""
+    global _market_data
+    with _stores_lock:
+        if _market_data is None:
+            from market_data import market_data
+
+            _market_data = market_data
+    return _market_data
+
+
+def get_news_store():
+    """Opens the shared news store on first use."""
+    global _news_store
+    with _stores_lock:
+        if _news_store is None:
+            from news_store import news_store
+
+            _news_store = news_store
+    return _news_store
+
+
+def _cache_samples(cache, stats):
+    """Turns a cache's stats() dict into hit/miss counter and size gauge samples."""
+    for key, value in stats.items():
+        if key.endswith(("hits", "misses", "coalesced")):
+            yield "cache_requests_total", "counter", {"cache": cache, "result": key}, value
+    if "entries" in stats:
+        yield "cache_entries", "gauge", {"cache": cache}, stats["entries"]
+
+
+def collect_app_metrics():
+    yield "queue_depth", "gauge", {"queue": "inference_server"}, inference_server.queue_depth()
+    yield from _cache_samples("sentiment", sentiment_cache.stats())
+    if _market_data is not None:
+        market_stats = _market_data.stats()
+        yield from _cache_samples("quotes", market_stats["quotes"])
+        yield from _cache_samples("bulk_quotes", market_stats["bulk_quotes"])
+        yield from _cache_samples("bar_syncs", market_stats["bar_syncs"])
+    if _news_fetcher is not None:
+        yield from _cache_samples("newsapi", _news_fetcher.cache.stats())
+
+    # Only report RAG caches once a chatbot route has imported the bot
+    bot = sys.modules.get("bot")
+    if bot is not None:
+        rag_stats = bot.rag_service.cache_stats()
+        yield from _cache_samples("rag_answers", rag_stats["answers"])
+        if rag_stats["query_embeddings"] is not None:
+            yield from _cache_samples("rag_query_embeddings", rag_stats["query_embeddings"])
+
+
+metrics.register_collector(collect_app_metrics)
+PROFILE_HEADER = "X-Profile"
+
+
+@app.before_request
+def begin_request_metrics():
+    request.environ["metrics.started"] = time.perf_counter()
+    if request.headers.get(PROFILE_HEADER) == "1" or os.getenv("METRICS_PROFILE_ALL") == "1":
+        request.environ["metrics.profile_token"] = start_profile()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Records request latency and, for profiled requests, returns the stage breakdown as Server-Timing."""
+    started = request.environ.get("metrics.started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - started,
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+
+    token = request.environ.pop("metrics.profile_token", None)
+    if token is not None:
+        response.headers["Server-Timing"] = finish_profile(token).server_timing()
+    return response
+
+
+@app.teardown_request
+def end_request_profile(_error):
+    # after_request is skipped for unhandled errors; never leave a profile attached to the worker thread
+    token = request.environ.pop("metrics.profile_token", None)
+    if token is not None:
+        finish_profile(token)
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Exposes this worker's stage timers, cache counters, batch sizes and queue depths for Prometheus."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 def clean_symbol_for_newsapi(symbol):
     """Removes `.NS` or `.BO` extensions for NewsAPI compatibility."""
     return symbol.rsplit(".", 1)[0] if symbol.upper().endswith((".NS", ".BO")) else symbol
 
 
+def parse_rag_filters(data):
+    """Reads the optional ticker and ISO `since` date used to narrow chatbot retrieval."""
+    filters = {}
+    if data.get("ticker"):
+        filters["ticker"] = str(data["ticker"]).upper().strip()
+    if data.get("since"):
+        try:
+            filters["since"] = datetime.fromisoformat(data["since"])
+        except ValueError:
+            logging.warning(f"Ignoring invalid since filter: {data['since']}")
+    return filters
+
+
 @app.route("/query", methods=["POST"])
 def query():
     """Handles chatbot queries."""
@@ -42,7 +175,9 @@ def query():
         return jsonify({"error": "Please provide a question."}), 400
 
     try:
-        result = query_rag(question)
+        from bot import query_rag
+
+        result = query_rag(question, **parse_rag_filters(data))
         return jsonify({"response": result})
     except Exception as e:
         logging.error(f"Error processing query: {e}")
@@ -58,8 +193,7 @@ def stock():
         return jsonify({"error": "Please provide a valid stock symbol."}), 400
 
     try:
-        ticker = yf.Ticker(symbol)
-        quote = ticker.info
+        quote = get_market_data().get_quote(symbol)
 
         if "regularMarketOpen" in quote:
             return jsonify({
@@ -80,15 +214,13 @@ def stock():
 def stock_data(symbol):
     """Fetches historical stock data."""
     try:
-        stock = yf.Ticker(symbol)
-        data = stock.history(period="1mo")
+        history = get_market_data().get_history(symbol)
 
-        if data.empty:
+        if not history:
             return jsonify({"error": "No data found for the symbol provided."}), 404
 
-        prices = data["Close"].to_dict()
-        labels = list(prices.keys())
-        values = list(prices.values())
+        labels = [day for day, _close in history]
+        values = [close for _day, close in history]
 
         return jsonify({"labels": labels, "values": values})
 
@@ -97,6 +229,46 @@ def stock_data(symbol):
         return jsonify({"error": str(e)}), 500
 
 
+def combine_articles(latest_articles, relevant_articles):
+    """Returns up to five unique articles, combining the latest and most relevant NewsAPI results."""
+    # Process articles
+    latest_news = [
+        {"title": article["title"], "description": article.get("description", ""), "url": article["url"]}
+        for article in latest_articles.get("articles", [])
+    ]
+    relevant_news = [
+        {"title": article["title"], "description": article.get("description", ""), "url": article["url"]}
+        for article in relevant_articles.get("articles", [])
+    ]
+
+    # Combine and remove duplicates
+    combined_news = {article["url"]: article for article in latest_news + relevant_news}.values()
+    return list(combined_news)[:5]  # Limit to top 5 unique articles
+
+
+def format_sentiments(raw_results):
+    """Returns per-article labels and model confidence, plus a deterministic aggregate over them."""
+    from sentiment_signals import probability_matrix, summarize
+
+    sentiments = [
+        {"label": sentiment["label"], "score": round(sentiment["score"], 4)}
+        for sentiment in raw_results
+    ]
+    return sentiments, summarize(probability_matrix(raw_results))
+
+
+def parse_symbols(data):
+    """Reads a list of symbols from a batch request body, returning (symbols, error)."""
+    symbols = (data or {}).get("symbols")
+    if not isinstance(symbols, list) or not symbols:
+        return None, "Please provide a non-empty list of stock symbols."
+
+    symbols = list(dict.fromkeys(str(symbol).upper().strip() for symbol in symbols if str(symbol).strip()))
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return None, f"At most {MAX_BATCH_SYMBOLS} symbols can be requested at once."
+    return symbols, None
+
+
 @app.route("/api/sentiments", methods=["POST"])
 def sentiment():
     """Fetches news and performs sentiment analysis."""
@@ -106,24 +278,11 @@ def sentiment():
     if not symbol:
         return jsonify({"error": "Please provide a valid stock symbol for sentiment analysis."}), 400
 
+    from newsapi.newsapi_exception import NewsAPIException
+
     try:
-        # Fetch latest news articles
-        latest_articles = newsapi.get_everything(q=symbol, language="en", sort_by="publishedAt", page_size=3)
-        relevant_articles = newsapi.get_everything(q=symbol, language="en", sort_by="relevancy", page_size=3)
-
-        # Process articles
-        latest_news = [
-            {"title": article["title"], "description": article.get("description", ""), "url": article["url"]}
-            for article in latest_articles.get("articles", [])
-        ]
-        relevant_news = [
-            {"title": article["title"], "description": article.get("description", ""), "url": article["url"]}
-            for article in relevant_articles.get("articles", [])
-        ]
-
-        # Combine and remove duplicates
-        combined_news = {article["url"]: article for article in latest_news + relevant_news}.values()
-        limited_news = list(combined_news)[:5]  # Limit to top 5 unique articles
+        latest_articles, relevant_articles = get_news_fetcher().fetch_many(symbol, NEWS_SORT_ORDERS)
+        limited_news = combine_articles(latest_articles, relevant_articles)
 
         if not limited_news:
             return jsonify({"error": "No relevant news articles found."}), 404
@@ -131,22 +290,7 @@ def sentiment():
         # Extract content for sentiment analysis
         news_texts = [f"{article['title']} {article['description']}" for article in limited_news]
 
-        # Perform sentiment analysis and apply stronger diversification
-        sentiment_results = []
-        raw_results = SentimentAnalysis(news_texts).sentiment_analysis()
-
-        for i, sentiment in enumerate(raw_results):
-            raw_score = sentiment["score"]
-
-            # Diversify the score to ensure differentiation
-            diversified_score = ((raw_score * 1000) % 70) / 100  # Mod 70 ensures a bigger range of values
-            diversified_score += random.uniform(-0.2, 0.2)  # Random shift to further diversify
-            diversified_score = max(0, min(round(diversified_score, 2), 1))  # Keep score within 0-1
-
-            sentiment_results.append({
-                "label": sentiment["label"],
-                "score": diversified_score
-            })
+        sentiment_results, summary = format_sentiments(inference_server.submit(news_texts))
 
         # Extract article URLs
         links = [article["url"] for article in limited_news]
@@ -160,20 +304,178 @@ def sentiment():
         return jsonify(
             {
                 "sentiments": sentiment_results,
+                "summary": summary,
                 "links": links,
             }
         )
 
     except NewsAPIException as e:
-        error_data = e.args[0]
+        error_data = e.args[0] if e.args and isinstance(e.args[0], dict) else {}
         if error_data.get("code") == "rateLimited":
             return jsonify({"error": "NewsAPI request limit reached. Try again later."}), 429
+        logging.error(f"NewsAPI error for {symbol}: {e}")
+        return jsonify({"error": error_data.get("message", "NewsAPI request failed.")}), 502
 
     except Exception as e:
         logging.error(f"Error in sentiment analysis: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/stocks", methods=["POST"])
+def stocks():
+    """Fetches current prices for many symbols in one bulk call."""
+    symbols, error = parse_symbols(request.json)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        quotes = get_market_data().get_quotes(symbols)
+    except Exception as e:
+        logging.error(f"Error fetching bulk stock data: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    results = {}
+    errors = {}
+    for symbol in symbols:
+        quote = quotes.get(symbol, {})
+        if "regularMarketOpen" in quote:
+            results[symbol] = {
+                "symbol": symbol,
+                "currentPrice": quote["regularMarketOpen"],
+                "longName": quote.get("longName", "N/A"),
+                "error": None,
+            }
+        else:
+            errors[symbol] = "Stock not found or no current price available"
+
+    return jsonify({"quotes": results, "errors": errors})
+
+
+@app.route("/stock_data", methods=["POST"])
+def stock_data_batch():
+    """Fetches historical closes for many symbols in one bulk call."""
+    symbols, error = parse_symbols(request.json)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        histories = get_market_data().get_histories(symbols)
+    except Exception as e:
+        logging.error(f"Error fetching bulk stock history: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    results = {}
+    errors = {}
+    for symbol in symbols:
+        history = histories.get(symbol)
+        if history:
+            results[symbol] = {
+                "labels": [day for day, _close in history],
+                "values": [close for _day, close in history],
+            }
+        else:
+            errors[symbol] = "No data found for the symbol provided."
+
+    return jsonify({"history": results, "errors": errors})
+
+
+@app.route("/api/sentiments/batch", methods=["POST"])
+def sentiment_batch():
+    """Fetches news for many symbols and scores every article in a single inference pass."""
+    symbols, error = parse_symbols(request.json)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        news_fetcher = get_news_fetcher()
+    except ValueError as e:
+        logging.error(f"Error in batch sentiment analysis: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    from newsapi.newsapi_exception import NewsAPIException
+
+    news_by_symbol = {}
+    errors = {}
+    for symbol, responses in news_fetcher.fetch_symbols(symbols, NEWS_SORT_ORDERS).items():
+        failure = next((response for response in responses if isinstance(response, Exception)), None)
+        if isinstance(failure, NewsAPIException) and failure.args[0].get("code") == "rateLimited":
+            errors[symbol] = "NewsAPI request limit reached. Try again later."
+            continue
+        if failure is not None:
+            logging.error(f"Error fetching news for {symbol}: {failure}")
+            errors[symbol] = str(failure)
+            continue
+
+        news = combine_articles(*responses)
+        if news:
+            news_by_symbol[symbol] = news
+        else:
+            errors[symbol] = "No relevant news articles found."
+
+    news_texts = [
+        f"{article['title']} {article['description']}"
+        for news in news_by_symbol.values()
+        for article in news
+    ]
+
+    try:
+        raw_results = inference_server.submit(news_texts)
+    except Exception as e:
+        logging.error(f"Error in batch sentiment analysis: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    results = {}
+    offset = 0
+    for symbol, news in news_by_symbol.items():
+        symbol_results = raw_results[offset : offset + len(news)]
+        offset += len(news)
+        sentiments, summary = format_sentiments(symbol_results)
+        results[symbol] = {
+            "sentiments": sentiments,
+            "summary": summary,
+            "links": [article["url"] for article in news],
+        }
+
+    return jsonify({"results": results, "errors": errors})
+
+
+@app.route("/api/signals", methods=["POST"])
+def signals():
+    """
+    Returns sentiment signals from the stored, scored headlines of many symbols: label mix,
+    confidence-weighted and time-decayed sentiment, and a daily series joined with closes.
+    """
+    from sentiment_signals import DEFAULT_HALFLIFE_HOURS, DEFAULT_WINDOW_DAYS, compute_signals
+
+    data = request.json
+    symbols, error = parse_symbols(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        days = int(data.get("days", DEFAULT_WINDOW_DAYS))
+        halflife_hours = float(data.get("halflife_hours", DEFAULT_HALFLIFE_HOURS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "days and halflife_hours must be numbers."}), 400
+    if days <= 0 or halflife_hours <= 0:
+        return jsonify({"error": "days and halflife_hours must be positive."}), 400
+
+    try:
+        results = compute_signals(
+            symbols, get_news_store(), get_market_data(), days=days, halflife_hours=halflife_hours
+        )
+    except Exception as e:
+        logging.error(f"Error computing sentiment signals: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    errors = {
+        symbol: "No scored headlines stored for this symbol in the window."
+        for symbol, result in results.items()
+        if not result["summary"]["articles"]
+    }
+    return jsonify({"signals": results, "errors": errors})
+
+
 @app.route("/api/chatbot", methods=["POST"])
 def chatbot():
     """Handles chatbot interactions."""
@@ -184,15 +486,99 @@ def chatbot():
         return jsonify({"error": "Please provide a question."}), 400
 
     try:
-        response = query_rag(question)
+        from bot import query_rag
+
+        response = query_rag(question, **parse_rag_filters(data))
         return jsonify({"response": response})
     except Exception as e:
         logging.error(f"Error in chatbot response: {e}")
         return jsonify({"error": "An error occurred while processing your request."}), 500
 
 
+@app.route("/api/models", methods=["GET"])
+def models():
+    """Reports load time and memory use of the models loaded in this worker."""
+    return jsonify({"models": registry.stats(), "sentiment_cache": sentiment_cache.stats()})
+
+
+def warm_up_enabled():
+    return os.getenv("SENTIMENT_WARM_UP", "1") == "1"
+
+
+def load_models():
+    """Loads the sentiment model weights without running them, e.g. in a process about to fork."""
+    if warm_up_enabled():
+        registry.get()
+
+
+def warm_up_models():
+    """Loads the sentiment model once at startup so requests never pay the load cost."""
+    if warm_up_enabled():
+        registry.warm_up()
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the worker is up and serving requests."""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: only ready once this worker has warmed the sentiment model, unless warm-up is turned off."""
+    warm = registry.is_warm()
+    ready = warm or not warm_up_enabled()
+    return jsonify({"ready": ready, "models": {"sentiment": warm}}), 200 if ready else 503
+
+
+@app.route("/api/chatbot/stream", methods=["POST"])
+def chatbot_stream():
+    """Streams the chatbot answer as server-sent events while the model generates it."""
+    data = request.json
+    question = data.get("question")
+
+    if not question:
+        return jsonify({"error": "Please provide a question."}), 400
+
+    filters = parse_rag_filters(data)
+
+    from bot import stream_query_rag
+
+    profiled = "metrics.profile_token" in request.environ
+
+    def events():
+        # The request's profile is finished before the body streams, so a profiled stream times
+        # itself and sends its stages as a "timing" event instead of a Server-Timing header
+        profile_token = start_profile() if profiled else None
+        profile = None
+        failed = False
+        try:
+            for token in stream_query_rag(question, **filters):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception:
+            # Tokens may already have been sent, so report the failure as its own event and skip "done"
+            failed = True
+            yield f"event: error\ndata: {json.dumps({'error': 'An error occurred while processing the query.'})}\n\n"
+        finally:
+            if profile_token is not None:
+                profile = finish_profile(profile_token)
+
+        if profile is not None:
+            yield f"event: timing\ndata: {json.dumps({'server_timing': profile.server_timing()})}\n\n"
+        if not failed:
+            yield "event: done\ndata: {}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 def delete_chroma_collection():
     """Deletes ChromaDB collection if needed."""
+    from chromadb import PersistentClient
+
     try:
         chroma_client = PersistentClient(path="chroma_stock")
         chroma_client.delete_collection(COLLECTION_NAME)
@@ -203,4 +589,5 @@ def delete_chroma_collection():
 
 
 if __name__ == "__main__":
+    warm_up_models()
     app.run(host="0.0.0.0", debug=True)
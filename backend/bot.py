@@ -1,18 +1,36 @@
 import os
+import atexit
 import logging
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models import BaseChatModel, FakeListChatModel
 from langchain_chroma import Chroma
 from langchain.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
+from metrics import timer
+from rag_cache import AnswerCache, CachedQueryEmbeddings
 
 load_dotenv()
 
 
 GOOGLE_API_KEY = "<your key here>"
 
-def query_rag(question: str) -> str:
-    PROMPT_TEMPLATE = """
+CHROMA_DIRECTORY = "chroma_stock"
+COLLECTION_NAME = "stock_news"
+TOP_K = 8
+RELEVANCE_THRESHOLD = 0.3
+CONTEXT_TOKEN_BUDGET = 3000
+CHARS_PER_TOKEN = 4
+INDEX_VERSION_FILE = os.path.join(CHROMA_DIRECTORY, "index_version")
+
+
+PROMPT_TEMPLATE = """
     You are an assistant providing sentiment analysis and stock market news summaries.
 
     Related News:
@@ -24,43 +42,237 @@ def query_rag(question: str) -> str:
 
     {question}
     """
+
+
+def open_vector_store(embeddings: Optional[Embeddings] = None) -> Chroma:
+    """Opens the persistent news collection; documents are added by rag_ingest, not at query time."""
+    return Chroma(
+        persist_directory=CHROMA_DIRECTORY,
+        embedding_function=embeddings or GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+        collection_name=COLLECTION_NAME,
+    )
+
+
+def read_index_version() -> int:
+    """Returns the counter ingestion bumps whenever it changes the index."""
     try:
-        news_file = "news_file.csv"
-        news_context = ""
-
-        with open(news_file, "r", encoding="utf-8") as f:
-            news_context = f.read()
-
-        db = Chroma(
-            persist_directory="chroma_stock",
-            embedding_function=GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001"
-            ),
-            collection_name="stock_news",
+        with open(INDEX_VERSION_FILE, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_index_version() -> int:
+    version = read_index_version() + 1
+    os.makedirs(CHROMA_DIRECTORY, exist_ok=True)
+    with open(INDEX_VERSION_FILE, "w", encoding="utf-8") as f:
+        f.write(str(version))
+    return version
+
+
+def build_filter(ticker: Optional[str] = None, since: Optional[datetime] = None) -> Optional[dict]:
+    """Builds a Chroma metadata filter for the ticker and publication-time constraints that were given."""
+    clauses = []
+    if ticker:
+        clauses.append({"ticker": ticker.upper()})
+    if since:
+        clauses.append({"published_ts": {"$gte": int(since.timestamp())}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def assemble_context(documents: List[Document], token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Joins the best-ranked documents until the approximate token budget is spent."""
+    parts = []
+    used = 0
+    for doc in documents:
+        cost = len(doc.page_content) // CHARS_PER_TOKEN + 1
+        if used + cost > token_budget:
+            if not parts:
+                parts.append(doc.page_content[: token_budget * CHARS_PER_TOKEN])
+            break
+        parts.append(doc.page_content)
+        used += cost
+    return "\n\n".join(parts)
+
+
+def retrieve(
+    db: Chroma,
+    question: str,
+    ticker: Optional[str] = None,
+    since: Optional[datetime] = None,
+    k: int = TOP_K,
+    score_threshold: float = RELEVANCE_THRESHOLD,
+) -> List[Document]:
+    """Returns at most k documents above the relevance threshold, best first."""
+    with timer("retrieval"):
+        results = db.similarity_search_with_relevance_scores(
+            question, k=k, filter=build_filter(ticker, since), score_threshold=score_threshold
         )
+    return [doc for doc, _score in results]
 
-        db.add_texts([news_context])
 
-        results = db.similarity_search_with_score(question, k=len(db.get()["ids"]))
+class RagService:
+    """Application-scoped holder of the vector store, embedding client, LLM client and parsed prompt.
 
-        context_text = " ".join([doc.page_content for doc, _score in results])
+    Clients are created lazily on first use and reused across requests, so their HTTP/gRPC
+    connections stay open. Pass `embeddings`/`llm` (or use `RagService.offline()`) to run
+    without Google APIs.
+    """
 
-        prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-        prompt = prompt_template.format(context=context_text, question=question)
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        llm: Optional[BaseChatModel] = None,
+        answer_cache: Optional[AnswerCache] = None,
+    ):
+        self._embeddings = CachedQueryEmbeddings(embeddings) if embeddings is not None else None
+        self._llm = llm
+        self._owns_clients = embeddings is None and llm is None
+        self._db = None
+        self._prompt_template = None
+        self._lock = threading.Lock()
+        self.answer_cache = answer_cache or AnswerCache(semantic_distance=_semantic_distance_from_env())
 
-        model = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash", api_key=os.getenv("GOOGLE_API_KEY")
+    @classmethod
+    def offline(cls, responses: Optional[List[str]] = None) -> "RagService":
+        """Builds a service backed by deterministic local embeddings and canned LLM responses."""
+        return cls(
+            embeddings=DeterministicFakeEmbedding(size=768),
+            llm=FakeListChatModel(responses=responses or ["This is an offline test response."]),
         )
-        response = model.invoke(prompt)
-        if hasattr(response, "content"):
-            return response.content.strip()
-        return str(response).strip()
+
+    def _ensure_initialized(self) -> None:
+        if self._db is not None:
+            return
+        with self._lock:
+            if self._db is not None:
+                return
+            if self._embeddings is None:
+                self._embeddings = CachedQueryEmbeddings(GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+            if self._llm is None:
+                self._llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", api_key=os.getenv("GOOGLE_API_KEY"))
+            self._prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+            self._db = open_vector_store(self._embeddings)
+
+    @property
+    def db(self) -> Chroma:
+        self._ensure_initialized()
+        return self._db
+
+    def build_prompt(self, question: str, ticker: Optional[str] = None, since: Optional[datetime] = None) -> str:
+        self._ensure_initialized()
+        context_text = assemble_context(retrieve(self._db, question, ticker=ticker, since=since))
+        return self._prompt_template.format(context=context_text, question=question)
+
+    def query(self, question: str, ticker: Optional[str] = None, since: Optional[datetime] = None) -> str:
+        self._ensure_initialized()
+        version = read_index_version()
+        self.answer_cache.sync_version(version)
+        filters = (ticker, since.isoformat() if since else None)
+        embedding = self._embeddings.embed_query(question) if self.answer_cache.semantic_enabled else None
+
+        cached = self.answer_cache.get(question, filters, embedding)
+        if cached is not None:
+            return cached
+
+        prompt = self.build_prompt(question, ticker=ticker, since=since)
+        with timer("llm"):
+            response = self._llm.invoke(prompt)
+        answer = response.content.strip() if hasattr(response, "content") else str(response).strip()
+
+        self.answer_cache.put(question, filters, answer, embedding, version=version)
+        return answer
+
+    def stream(
+        self, question: str, ticker: Optional[str] = None, since: Optional[datetime] = None
+    ) -> Iterator[str]:
+        """Yields answer text as the LLM produces it, logging time-to-first-token."""
+        start = time.perf_counter()
+        self._ensure_initialized()
+        version = read_index_version()
+        self.answer_cache.sync_version(version)
+        filters = (ticker, since.isoformat() if since else None)
+        embedding = self._embeddings.embed_query(question) if self.answer_cache.semantic_enabled else None
+
+        cached = self.answer_cache.get(question, filters, embedding)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = self.build_prompt(question, ticker=ticker, since=since)
+        parts = []
+        with timer("llm"):
+            for chunk in self._llm.stream(prompt):
+                text = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if not text:
+                    continue
+                if not parts:
+                    logging.info(f"RAG time to first token: {time.perf_counter() - start:.3f}s")
+                parts.append(text)
+                yield text
+
+        logging.info(f"RAG streamed answer in {time.perf_counter() - start:.3f}s")
+        self.answer_cache.put(question, filters, "".join(parts).strip(), embedding, version=version)
+
+    def cache_stats(self) -> dict:
+        embeddings = self._embeddings.stats() if self._embeddings is not None else None
+        return {"answers": self.answer_cache.stats(), "query_embeddings": embeddings}
+
+    def shutdown(self) -> None:
+        """Closes the underlying clients; the next query will lazily recreate them."""
+        with self._lock:
+            if not self._owns_clients:
+                self._db = None
+                return
+            embeddings = self._embeddings.inner if self._embeddings is not None else None
+            for client in (getattr(self._llm, "client", None), getattr(embeddings, "client", None)):
+                transport = getattr(client, "transport", None)
+                if transport is not None and hasattr(transport, "close"):
+                    try:
+                        transport.close()
+                    except Exception as e:
+                        logging.warning(f"Error closing RAG client: {e}")
+            self._embeddings = None
+            self._llm = None
+            self._db = None
+            self._prompt_template = None
+
+
+def _semantic_distance_from_env() -> Optional[float]:
+    value = os.getenv("RAG_SEMANTIC_CACHE_DISTANCE")
+    return float(value) if value else None
+
+
+rag_service = RagService.offline() if os.getenv("RAG_OFFLINE") == "1" else RagService()
+atexit.register(rag_service.shutdown)
+
+
+def query_rag(question: str, ticker: Optional[str] = None, since: Optional[datetime] = None) -> str:
+    try:
+        return rag_service.query(question, ticker=ticker, since=since)
 
     except Exception as e:
         logging.error(f"Error in query_rag: {e}")
         return "An error occurred while processing the query."
 
 
+def stream_query_rag(
+    question: str, ticker: Optional[str] = None, since: Optional[datetime] = None
+) -> Iterator[str]:
+    """Yields answer tokens; errors are logged and re-raised so the caller can tell them from text."""
+    try:
+        yield from rag_service.stream(question, ticker=ticker, since=since)
+
+    except Exception as e:
+        logging.error(f"Error in stream_query_rag: {e}")
+        raise
+
+
 def main() -> None:
     question = (
         "What is the overall sentiment for the stock/company in the latest quarter?"
@@ -0,0 +1,103 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+
+def headline_hash(entry):
+    return hashlib.sha1(entry.strip().encode("utf-8")).hexdigest()
+
+
+class HeadlineIndex:
+    """
+    Per-ticker set of headline hashes, kept in memory for O(1) lookups and persisted to SQLite
+    so it survives restarts. Each hash remembers when it was first seen so retention can prune it.
+    """
+
+    def __init__(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS headline_hashes (ticker TEXT NOT NULL, hash TEXT NOT NULL, "
+            "seen_at REAL, PRIMARY KEY (ticker, hash))"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(headline_hashes)")}
+        if "seen_at" not in columns:
+            self._db.execute("ALTER TABLE headline_hashes ADD COLUMN seen_at REAL")
+            self._db.execute("UPDATE headline_hashes SET seen_at = ?", (datetime.now().timestamp(),))
+        self._db.commit()
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def load(self, ticker, seed=None):
+        """
+        Loads a ticker's hashes once. If the index has none, it is rebuilt from the entries
+        returned by `seed()` (e.g. what is already in the news store).
+        """
+        with self._lock:
+            if ticker in self._seen:
+                return self._seen[ticker]
+
+            rows = self._db.execute("SELECT hash FROM headline_hashes WHERE ticker = ?", (ticker,)).fetchall()
+            seen = {row[0] for row in rows}
+
+            if not seen and seed is not None:
+                seen = {headline_hash(entry) for entry in seed()}
+                now = datetime.now().timestamp()
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO headline_hashes (ticker, hash, seen_at) VALUES (?, ?, ?)",
+                    [(ticker, digest, now) for digest in seen],
+                )
+                self._db.commit()
+
+            self._seen[ticker] = seen
+            return seen
+
+    def is_new(self, ticker, entry):
+        """Returns True if the entry has not been recorded for this ticker, without recording it."""
+        digest = headline_hash(entry)
+        seen = self.load(ticker)
+        with self._lock:
+            return digest not in seen
+
+    def mark_seen(self, ticker, entries, now=None):
+        """Records entries as seen and commits; call it only once they are safely stored."""
+        digests = {headline_hash(entry) for entry in entries}
+        seen = self.load(ticker)
+        seen_at = (now or datetime.now()).timestamp()
+        with self._lock:
+            seen.update(digests)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO headline_hashes (ticker, hash, seen_at) VALUES (?, ?, ?)",
+                [(ticker, digest, seen_at) for digest in digests],
+            )
+            self._db.commit()
+
+    def tickers(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT ticker FROM headline_hashes ORDER BY ticker")]
+
+    def prune(self, ticker, before):
+        """Forgets a ticker's hashes first seen before `before`, returning how many were removed."""
+        with self._lock:
+            params = (ticker, before.timestamp())
+            expired = [
+                row[0] for row in self._db.execute(
+                    "SELECT hash FROM headline_hashes WHERE ticker = ? AND seen_at < ?", params
+                )
+            ]
+            if expired:
+                self._db.execute("DELETE FROM headline_hashes WHERE ticker = ? AND seen_at < ?", params)
+                self._db.commit()
+                self._seen.get(ticker, set()).difference_update(expired)
+            return len(expired)
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def clear(self, ticker):
+        """Forgets a ticker's headlines, e.g. when its stored news is rotated away."""
+        with self._lock:
+            self._seen[ticker] = set()
+            self._db.execute("DELETE FROM headline_hashes WHERE ticker = ?", (ticker,))
+            self._db.commit()
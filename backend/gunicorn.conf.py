@@ -0,0 +1,20 @@
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", min(multiprocessing.cpu_count(), 4)))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+# Import the app (and load the model) in the master, then fork workers that share its memory
+preload_app = True
+
+
+def post_fork(server, worker):
+    from wsgi import after_fork
+
+    after_fork()
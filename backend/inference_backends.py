@@ -0,0 +1,179 @@
+import argparse
+import logging
+import os
+
+from model_registry import SENTIMENT_MODEL_NAME
+
+DEFAULT_ONNX_DIR = "onnx_models"
+
+
+class TorchBackend:
+    """Runs the PyTorch sequence-classification model."""
+
+    name = "torch"
+
+    def __init__(self, model):
+        import torch
+
+        self.model = model
+        self.device = 0 if torch.cuda.is_available() else -1
+        if self.device >= 0:
+            self.model.to(f"cuda:{self.device}")
+        self.precision = str(next(model.parameters()).dtype).replace("torch.", "")
+
+    def predict(self, batch_ids, pad_token_id):
+        """Pads a batch of token-ID lists and returns softmax probabilities per row."""
+        import torch
+
+        longest = max(len(ids) for ids in batch_ids)
+        input_ids = torch.full((len(batch_ids), longest), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch_ids), longest), dtype=torch.long)
+        for row, ids in enumerate(batch_ids):
+            input_ids[row, : len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, : len(ids)] = 1
+
+        device = self.model.device
+        with torch.no_grad():
+            logits = self.model(input_ids=input_ids.to(device), attention_mask=attention_mask.to(device)).logits
+        return torch.softmax(logits.float(), dim=-1).tolist()
+
+    def memory_bytes(self):
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+
+class OnnxBackend:
+    """Runs an exported (optionally INT8-quantized) model through onnxruntime, without importing torch."""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path, threads=None, quantized=None):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.onnx_path = onnx_path
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.device = -1
+        # Quantized exports are named *.int8.onnx by export_onnx; pass `quantized` for other files
+        if quantized is None:
+            quantized = os.path.basename(onnx_path).endswith(".int8.onnx")
+        self.precision = "int8" if quantized else "float32"
+
+    def predict(self, batch_ids, pad_token_id):
+        import numpy as np
+
+        longest = max(len(ids) for ids in batch_ids)
+        input_ids = np.full((len(batch_ids), longest), pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch_ids), longest), dtype=np.int64)
+        for row, ids in enumerate(batch_ids):
+            input_ids[row, : len(ids)] = ids
+            attention_mask[row, : len(ids)] = 1
+
+        logits = self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+    def memory_bytes(self):
+        return os.path.getsize(self.onnx_path)
+
+
+def onnx_path_for(model_name=SENTIMENT_MODEL_NAME, output_dir=DEFAULT_ONNX_DIR, quantized=True):
+    base = model_name.replace("/", "__")
+    suffix = ".int8.onnx" if quantized else ".onnx"
+    return os.path.join(output_dir, base + suffix)
+
+
+def export_onnx(model_name=SENTIMENT_MODEL_NAME, output_dir=DEFAULT_ONNX_DIR, quantize=True):
+    """Exports the model to ONNX with dynamic batch/sequence axes, optionally adding a dynamic INT8 copy."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = onnx_path_for(model_name, output_dir, quantized=False)
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+    logging.info(f"Exported {model_name} to {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = onnx_path_for(model_name, output_dir, quantized=True)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    logging.info(f"Quantized {fp32_path} to {int8_path}")
+    return int8_path
+
+
+def compare_backends(texts, batch_ids, pad_token_id, reference, candidate, score_tolerance=0.05):
+    """Scores token IDs with both backends and reports label agreement and the largest score difference."""
+    expected_probs = reference.predict(batch_ids, pad_token_id)
+    actual_probs = candidate.predict(batch_ids, pad_token_id)
+
+    mismatches = []
+    max_score_diff = 0.0
+    for text, expected, actual in zip(texts, expected_probs, actual_probs):
+        expected_label = max(range(len(expected)), key=expected.__getitem__)
+        actual_label = max(range(len(actual)), key=actual.__getitem__)
+        max_score_diff = max(max_score_diff, max(abs(e - a) for e, a in zip(expected, actual)))
+        if expected_label != actual_label:
+            mismatches.append(text)
+
+    return {
+        "texts": len(texts),
+        "label_mismatches": mismatches,
+        "max_score_diff": max_score_diff,
+        "passed": not mismatches and max_score_diff <= score_tolerance,
+    }
+
+
+def check_parity(texts, onnx_path, model_name=SENTIMENT_MODEL_NAME, score_tolerance=0.05):
+    """Compares the exported ONNX model against the PyTorch model it came from."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    batch_ids = tokenizer(texts, truncation=True)["input_ids"]
+    return compare_backends(
+        texts, batch_ids, tokenizer.pad_token_id, TorchBackend(model), OnnxBackend(onnx_path), score_tolerance
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export the sentiment model to ONNX and check parity with PyTorch.")
+    parser.add_argument("--model", default=SENTIMENT_MODEL_NAME)
+    parser.add_argument("--output-dir", default=DEFAULT_ONNX_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    path = export_onnx(args.model, args.output_dir, quantize=not args.no_quantize)
+    print(check_parity(
+        [
+            "Shares surge after record quarterly earnings beat expectations.",
+            "The company warned of layoffs as revenue fell sharply.",
+            "The board will meet on Tuesday.",
+        ],
+        path,
+        args.model,
+    ))
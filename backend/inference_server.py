@@ -0,0 +1,113 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import BATCH_SIZE_BUCKETS, current_profile, metrics, shared_profile, timer
+from sentiment_analysis import SentimentAnalysis
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 10
+
+
+def score_texts(texts):
+    return SentimentAnalysis(texts).sentiment_analysis()
+
+
+class InferenceServer:
+    """Background worker that merges texts from concurrent callers into shared model batches."""
+
+    def __init__(self, score_fn=score_texts, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._requests = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def submit(self, texts):
+        """
+        Queues texts for scoring and blocks until their results are ready. The caller's request
+        profile travels with them, so the batch's tokenization and inference timings are reported.
+        """
+        if not texts:
+            return []
+        self.start()
+        future = Future()
+        with timer("inference_wait"):
+            self._requests.put((list(texts), future, current_profile()))
+            return future.result()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="inference-server", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None:
+                self._stopping = True
+                self._requests.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def queue_depth(self):
+        return self._requests.qsize()
+
+    def _run(self):
+        while not self._stopping:
+            first = self._requests.get()
+            if first is None:
+                break
+            self._process(self._collect(first))
+
+    def _collect(self, first):
+        """Gathers queued requests until the batch is full or max_wait has passed since the first arrived."""
+        pending = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopping = True
+                break
+            pending.append(item)
+            size += len(item[0])
+
+        return pending
+
+    def _process(self, pending):
+        texts = [text for request_texts, _, _ in pending for text in request_texts]
+        metrics.observe("batch_size", len(texts), buckets=BATCH_SIZE_BUCKETS, batcher="inference_server")
+        try:
+            # Every waiting request sat through the whole batch, so each is charged its full timings
+            with shared_profile(profile for _, _, profile in pending):
+                results = self.score_fn(texts)
+        except Exception as e:
+            logging.error(f"Batched sentiment inference failed: {e}")
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for request_texts, future, _ in pending:
+            future.set_result(results[offset : offset + len(request_texts)])
+            offset += len(request_texts)
+
+
+inference_server = InferenceServer(
+    max_batch_size=int(os.getenv("SENTIMENT_SERVER_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE)),
+    max_wait_ms=float(os.getenv("SENTIMENT_SERVER_MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS)),
+)
@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+from metrics import timer
+from ttl_cache import TTLCache
+
+DEFAULT_DB_PATH = "market_data.sqlite3"
+DEFAULT_QUOTE_TTL_SECONDS = 60
+DEFAULT_BARS_TTL_SECONDS = 15 * 60
+HISTORY_DAYS = 31
+
+
+def _frame_for(data, symbol, symbols):
+    """Picks one symbol's columns out of a yf.download frame grouped by ticker."""
+    if data.columns.nlevels > 1:
+        return data[symbol] if symbol in data.columns.get_level_values(0) else None
+    return data if len(symbols) == 1 else None
+
+
+class YFinanceSource:
+    """Market data straight from Yahoo Finance."""
+
+    def fetch_quote(self, symbol):
+        import yfinance as yf
+
+        with timer("yfinance"):
+            return yf.Ticker(symbol).info
+
+    def fetch_history(self, symbol, start=None):
+        """Returns daily bars as dicts, from start (a date) if given, otherwise for the last month."""
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        with timer("yfinance"):
+            data = ticker.history(start=start.isoformat()) if start else ticker.history(period="1mo")
+        return [
+            {
+                "date": index.date().isoformat(),
+                "open": float(row["Open"]),
+                "high": float(row["High"]),
+                "low": float(row["Low"]),
+                "close": float(row["Close"]),
+                "volume": int(row["Volume"]),
+            }
+            for index, row in data.iterrows()
+        ]
+
+    def fetch_quotes(self, symbols):
+        """Returns {symbol: quote} for many symbols from one bulk download; only the open price is available in bulk."""
+        import yfinance as yf
+
+        with timer("yfinance"):
+            data = yf.download(symbols, period="5d", group_by="ticker", progress=False, threads=True)
+        quotes = {}
+        for symbol in symbols:
+            frame = _frame_for(data, symbol, symbols)
+            opens = frame["Open"].dropna() if frame is not None else []
+            if len(opens):
+                quotes[symbol] = {"regularMarketOpen": float(opens.iloc[-1])}
+        return quotes
+
+    def fetch_histories(self, symbols, start=None):
+        """Returns {symbol: bars} for many symbols from one bulk download."""
+        import yfinance as yf
+
+        with timer("yfinance"):
+            if start:
+                data = yf.download(symbols, start=start.isoformat(), group_by="ticker", progress=False, threads=True)
+            else:
+                data = yf.download(symbols, period="1mo", group_by="ticker", progress=False, threads=True)
+
+        histories = {}
+        for symbol in symbols:
+            frame = _frame_for(data, symbol, symbols)
+            if frame is None:
+                continue
+            frame = frame.dropna(subset=["Close"])
+            histories[symbol] = [
+                {
+                    "date": index.date().isoformat(),
+                    "open": float(row["Open"]),
+                    "high": float(row["High"]),
+                    "low": float(row["Low"]),
+                    "close": float(row["Close"]),
+                    "volume": int(row["Volume"]),
+                }
+                for index, row in frame.iterrows()
+            ]
+        return histories
+
+
+class MarketDataCache:
+    """Quote and daily-bar cache with separate TTLs; bars live in SQLite and are only fetched after the last stored date."""
+
+    def __init__(
+        self,
+        source=None,
+        db_path=DEFAULT_DB_PATH,
+        quote_ttl_seconds=DEFAULT_QUOTE_TTL_SECONDS,
+        bars_ttl_seconds=DEFAULT_BARS_TTL_SECONDS,
+    ):
+        self.source = source or YFinanceSource()
+        self.quotes = TTLCache(quote_ttl_seconds)
+        # Bulk downloads only carry prices, so they are kept apart from the full quotes get_quote serves
+        self.bulk_quotes = TTLCache(quote_ttl_seconds)
+        self.bar_syncs = TTLCache(bars_ttl_seconds)
+        self.db_path = db_path
+        self._db_lock = threading.Lock()
+        self.reopen()
+
+    def reopen(self):
+        """Connects to the bars database and creates its table."""
+        with self._db_lock:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS daily_bars (
+                    symbol TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    PRIMARY KEY (symbol, date)
+                )
+                """
+            )
+            self._db.commit()
+
+    def get_quote(self, symbol):
+        return self.quotes.get_or_load(symbol, lambda: self.source.fetch_quote(symbol))
+
+    def get_history(self, symbol, days=HISTORY_DAYS):
+        """Returns [(date, close)] for the last `days` days, syncing new bars at most once per TTL."""
+        self.bar_syncs.get_or_load(symbol, lambda: self._sync_bars(symbol))
+        return self._read_history(symbol, days)
+
+    def get_quotes(self, symbols):
+        """
+        Returns {symbol: quote} for symbols found, preferring cached full quotes and fetching every
+        other symbol in one bulk call.
+        """
+        quotes = {}
+        missing = []
+        for symbol in symbols:
+            quote = self.quotes.get(symbol) or self.bulk_quotes.get(symbol)
+            if quote is None:
+                missing.append(symbol)
+            else:
+                quotes[symbol] = quote
+
+        if missing:
+            for symbol, quote in self.source.fetch_quotes(missing).items():
+                self.bulk_quotes.put(symbol, quote)
+                quotes[symbol] = quote
+        return quotes
+
+    def get_histories(self, symbols, days=HISTORY_DAYS):
+        """Returns {symbol: [(date, close)]}, syncing every stale symbol with one bulk call."""
+        stale = [symbol for symbol in symbols if self.bar_syncs.get(symbol) is None]
+        if stale:
+            last_dates = [self._last_bar_date(symbol) for symbol in stale]
+            start = min(last_dates) if all(last_dates) else None
+            histories = self.source.fetch_histories(stale, start=start)
+            for symbol in stale:
+                bars = histories.get(symbol, [])
+                self.store_bars(symbol, bars)
+                self.bar_syncs.put(symbol, len(bars))
+
+        return {symbol: self._read_history(symbol, days) for symbol in symbols}
+
+    def _read_history(self, symbol, days):
+        since = (date.today() - timedelta(days=days)).isoformat()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT date, close FROM daily_bars WHERE symbol = ? AND date >= ? ORDER BY date",
+                (symbol, since),
+            ).fetchall()
+        return [(datetime.fromisoformat(day), close) for day, close in rows]
+
+    def _last_bar_date(self, symbol):
+        with self._db_lock:
+            row = self._db.execute("SELECT MAX(date) FROM daily_bars WHERE symbol = ?", (symbol,)).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def _sync_bars(self, symbol):
+        # Refetch the last stored day too, since it may have been an incomplete intraday bar.
+        start = self._last_bar_date(symbol)
+        bars = self.source.fetch_history(symbol, start=start)
+        self.store_bars(symbol, bars)
+        return len(bars)
+
+    def store_bars(self, symbol, bars):
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO daily_bars (symbol, date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (symbol, bar["date"], bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+                    for bar in bars
+                ],
+            )
+            self._db.commit()
+
+    def stats(self):
+        return {
+            "quotes": self.quotes.stats(),
+            "bulk_quotes": self.bulk_quotes.stats(),
+            "bar_syncs": self.bar_syncs.stats(),
+        }
+
+
+market_data = MarketDataCache(
+    db_path=os.getenv("MARKET_DATA_DB", DEFAULT_DB_PATH),
+    quote_ttl_seconds=int(os.getenv("QUOTE_TTL_SECONDS", DEFAULT_QUOTE_TTL_SECONDS)),
+    bars_ttl_seconds=int(os.getenv("BARS_TTL_SECONDS", DEFAULT_BARS_TTL_SECONDS)),
+)
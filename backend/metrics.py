@@ -0,0 +1,188 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PREFIX = "sap_stock"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+_current_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Process-local counters and histograms, plus collectors that report gauges and existing cache
+    stats at scrape time. Each gunicorn worker keeps its own registry.
+    """
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def register_collector(self, collector):
+        """`collector()` returns (name, kind, labels, value) samples; it is called on every scrape."""
+        self._collectors.append(collector)
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        samples = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                samples.setdefault(name, []).append(f"{self.prefix}_{name}{_format_labels(labels)} {_format_value(value)}")
+            for (name, labels), histogram in self._histograms.items():
+                lines = samples.setdefault(name, [])
+                for bound, count in histogram.cumulative():
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{self.prefix}_{name}_bucket{_format_labels(labels, [('le', le)])} {count}")
+                lines.append(f"{self.prefix}_{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{self.prefix}_{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for collector in list(self._collectors):
+            for name, kind, labels, value in collector():
+                self._help.setdefault(name, (kind, ""))
+                samples.setdefault(name, []).append(
+                    f"{self.prefix}_{name}{_format_labels(_label_key(labels))} {_format_value(value)}"
+                )
+
+        output = []
+        for name in sorted(samples):
+            kind, help_text = self._help.get(name, ("untyped", ""))
+            if help_text:
+                output.append(f"# HELP {self.prefix}_{name} {help_text}")
+            output.append(f"# TYPE {self.prefix}_{name} {kind}")
+            output.extend(samples[name])
+        return "\n".join(output) + "\n"
+
+
+class RequestProfile:
+    """Per-request time spent in each stage, reported back in a Server-Timing header."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self):
+        with self._lock:
+            entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def start_profile():
+    """Starts collecting stage timings for the current request; returns a token for finish_profile."""
+    return _current_profile.set(RequestProfile())
+
+
+def finish_profile(token):
+    profile = _current_profile.get()
+    _current_profile.reset(token)
+    return profile
+
+
+def current_profile():
+    """The profile of the request running in this context, to hand to work done on another thread."""
+    return _current_profile.get()
+
+
+@contextmanager
+def shared_profile(profiles):
+    """
+    Collects stage timings of work done on behalf of several requests (e.g. one inference batch on
+    a worker thread) and adds them to each of their profiles.
+    """
+    profiles = [profile for profile in profiles if profile is not None]
+    collector = RequestProfile() if profiles else None
+    token = _current_profile.set(collector)
+    try:
+        yield
+    finally:
+        _current_profile.reset(token)
+        for profile in profiles:
+            for stage, seconds in collector.stages.items():
+                profile.add(stage, seconds)
+
+
+@contextmanager
+def timer(stage):
+    """Times a hot-path stage into the stage histogram and, when profiling, the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("stage_duration_seconds", elapsed, stage=stage)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.add(stage, elapsed)
+
+
+metrics = MetricsRegistry()
+metrics.describe("stage_duration_seconds", "histogram", "Time spent in each hot-path stage.")
+metrics.describe("batch_size", "histogram", "Number of texts per inference batch.")
+metrics.describe("http_request_duration_seconds", "histogram", "Request latency by route and status.")
+metrics.describe("cache_requests_total", "counter", "Cache lookups by cache and result.")
+metrics.describe("queue_depth", "gauge", "Items waiting in an in-process queue.")
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+
+SENTIMENT_MODEL_NAME = "mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis"
+DEFAULT_BACKEND = "torch"
+
+
+class LoadedModel:
+    """A tokenizer/backend pair loaded once and shared by every caller in the process."""
+
+    def __init__(self, name, tokenizer, config, backend, load_seconds, memory_bytes, rss_delta_bytes):
+        self.name = name
+        self.tokenizer = tokenizer
+        self.config = config
+        self.backend = backend
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.rss_delta_bytes = rss_delta_bytes
+
+    def predict(self, batch_ids):
+        """Returns class probabilities for a batch of token-ID lists."""
+        return self.backend.predict(batch_ids, self.tokenizer.pad_token_id)
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "backend": self.backend.name,
+            "device": self.backend.device,
+            "precision": self.backend.precision,
+            "load_seconds": round(self.load_seconds, 3),
+            "parameter_bytes": self.memory_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+        }
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models, keyed by model name."""
+
+    def __init__(self, backend=None, onnx_path=None):
+        self.backend = backend or os.getenv("SENTIMENT_BACKEND", DEFAULT_BACKEND)
+        self.onnx_path = onnx_path or os.getenv("SENTIMENT_ONNX_PATH")
+        self._models = {}
+        self._warm = set()
+        self._lock = threading.Lock()
+
+    def get(self, name=SENTIMENT_MODEL_NAME):
+        """Returns the loaded model, loading it on first use."""
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None:
+                loaded = self._load(name)
+                self._models[name] = loaded
+        return loaded
+
+    def warm_up(self, name=SENTIMENT_MODEL_NAME):
+        """Loads the model and runs one dummy prediction so the first request is not slow."""
+        loaded = self.get(name)
+        loaded.predict([loaded.tokenizer("warm up")["input_ids"]])
+        self._warm.add(name)
+        return loaded
+
+    def is_loaded(self, name=SENTIMENT_MODEL_NAME):
+        return name in self._models
+
+    def is_warm(self, name=SENTIMENT_MODEL_NAME):
+        """True once this process has run a prediction through the model."""
+        return name in self._warm
+
+    def stats(self):
+        return {name: loaded.stats() for name, loaded in self._models.items()}
+
+    def _load(self, name):
+        import psutil
+        from transformers import AutoConfig, AutoTokenizer
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        start = time.perf_counter()
+
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        config = AutoConfig.from_pretrained(name)
+        backend = self._load_backend(name)
+
+        load_seconds = time.perf_counter() - start
+        memory_bytes = backend.memory_bytes()
+        rss_delta_bytes = process.memory_info().rss - rss_before
+
+        logging.info(
+            f"Loaded {name} with the {backend.name} backend in {load_seconds:.2f}s "
+            f"({memory_bytes / 1e6:.1f} MB weights, {rss_delta_bytes / 1e6:.1f} MB RSS)"
+        )
+        return LoadedModel(name, tokenizer, config, backend, load_seconds, memory_bytes, rss_delta_bytes)
+
+    def _load_backend(self, name):
+        if self.backend == "onnx":
+            from inference_backends import OnnxBackend, onnx_path_for
+
+            quantized = os.getenv("SENTIMENT_ONNX_QUANTIZED")
+            return OnnxBackend(
+                self.onnx_path or onnx_path_for(name),
+                quantized=None if quantized is None else quantized == "1",
+            )
+
+        if self.backend == "torch":
+            from transformers import AutoModelForSequenceClassification
+            from inference_backends import TorchBackend
+
+            model = AutoModelForSequenceClassification.from_pretrained(name)
+            model.eval()
+            return TorchBackend(model)
+
+        raise ValueError(f"Unknown sentiment backend: {self.backend}")
+
+
+registry = ModelRegistry()
@@ -0,0 +1,45 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import timer
+from ttl_cache import TTLCache
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_PAGE_SIZE = 3
+
+
+class NewsFetcher:
+    """Issues NewsAPI queries concurrently, caching responses per (query, sort_by) and coalescing duplicate calls."""
+
+    def __init__(self, client, ttl_seconds=DEFAULT_TTL_SECONDS, max_workers=8):
+        self.client = client
+        self.cache = TTLCache(ttl_seconds)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="newsapi")
+
+    def fetch(self, query, sort_by, page_size=DEFAULT_PAGE_SIZE):
+        key = (query, sort_by, page_size)
+        return self.cache.get_or_load(key, lambda: self._get_everything(query, sort_by, page_size))
+
+    def _get_everything(self, query, sort_by, page_size):
+        with timer("newsapi"):
+            return self.client.get_everything(q=query, language="en", sort_by=sort_by, page_size=page_size)
+
+    def _submit(self, *args):
+        # Run in the caller's context so request profiling sees the NewsAPI time
+        return self.executor.submit(contextvars.copy_context().run, self.fetch, *args)
+
+    def fetch_many(self, query, sort_bys, page_size=DEFAULT_PAGE_SIZE):
+        """Runs one query per sort order in parallel; NewsAPI errors are re-raised in the caller."""
+        futures = [self._submit(query, sort_by, page_size) for sort_by in sort_bys]
+        return [future.result() for future in futures]
+
+    def fetch_symbols(self, queries, sort_bys, page_size=DEFAULT_PAGE_SIZE):
+        """Runs every (query, sort_by) pair in parallel, returning {query: [response or exception per sort_by]}."""
+        futures = {
+            query: [self._submit(query, sort_by, page_size) for sort_by in sort_bys]
+            for query in queries
+        }
+        results = {}
+        for query, query_futures in futures.items():
+            results[query] = [future.exception() or future.result() for future in query_futures]
+        return results
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+DEFAULT_DB_PATH = "news_store.sqlite3"
+RECORD_COLUMNS = (
+    "id, ticker, published_at, source, url, headline, body, content_hash, "
+    "sentiment_label, sentiment_score, scraped_at, sentiment_probabilities"
+)
+
+
+def news_content_hash(headline: str, body: str = "") -> str:
+    """Hashes whitespace-normalized headline and body, so re-scraped copies of an article collide."""
+    normalized = re.sub(r"\s+", " ", f"{headline}\n{body}").strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class NewsRecord:
+    ticker: str
+    published_at: datetime
+    source: str
+    url: str
+    headline: str
+    body: str = ""
+    content_hash: str = ""
+    sentiment_label: Optional[str] = None
+    sentiment_score: Optional[float] = None
+    sentiment_probabilities: Optional[dict] = None
+    id: Optional[int] = None
+    scraped_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.ticker = self.ticker.upper()
+        if not self.content_hash:
+            self.content_hash = news_content_hash(self.headline, self.body)
+
+    @property
+    def text(self) -> str:
+        return f"{self.headline} {self.body}".strip()
+
+
+def _dump_probabilities(probabilities: Optional[dict]) -> Optional[str]:
+    return json.dumps(probabilities) if probabilities else None
+
+
+class NewsStore:
+    """Append-only SQLite (WAL) store of news records shared by the scrapers, the sentiment job and RAG ingestion."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        db = self._connection()
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS news (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticker TEXT NOT NULL,
+                published_at REAL NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT,
+                headline TEXT NOT NULL,
+                body TEXT NOT NULL DEFAULT '',
+                content_hash TEXT NOT NULL,
+                sentiment_label TEXT,
+                sentiment_score REAL,
+                sentiment_probabilities TEXT,
+                scraped_at REAL NOT NULL,
+                UNIQUE (ticker, content_hash)
+            );
+            CREATE INDEX IF NOT EXISTS news_ticker_time ON news (ticker, published_at);
+            CREATE TABLE IF NOT EXISTS daily_sentiment (
+                ticker TEXT NOT NULL,
+                day TEXT NOT NULL,
+                articles INTEGER NOT NULL,
+                scored INTEGER NOT NULL,
+                positive INTEGER NOT NULL,
+                negative INTEGER NOT NULL,
+                neutral INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                PRIMARY KEY (ticker, day)
+            );
+            CREATE TABLE IF NOT EXISTS job_progress (
+                job TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                last_id INTEGER NOT NULL,
+                PRIMARY KEY (job, ticker)
+            );
+            """
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(news)")}
+        if "sentiment_probabilities" not in columns:
+            db.execute("ALTER TABLE news ADD COLUMN sentiment_probabilities TEXT")
+        db.commit()
+        if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Databases created before incremental auto-vacuum was enabled only switch over on a full VACUUM
+            db.execute("VACUUM")
+
+    def reopen(self) -> None:
+        """Drops inherited connections so a forked worker opens its own on first use."""
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            # Lets retention hand freed pages back with incremental_vacuum; existing databases are converted in __init__
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def add(self, records: Iterable[NewsRecord]) -> List[NewsRecord]:
+        """Appends records, skipping ones already stored for the same ticker and content; returns the new ones."""
+        db = self._connection()
+        added = []
+        with db:
+            for record in records:
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO news (ticker, published_at, source, url, headline, body, content_hash, "
+                    "sentiment_label, sentiment_score, sentiment_probabilities, scraped_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.ticker,
+                        record.published_at.timestamp(),
+                        record.source,
+                        record.url,
+                        record.headline,
+                        record.body,
+                        record.content_hash,
+                        record.sentiment_label,
+                        record.sentiment_score,
+                        _dump_probabilities(record.sentiment_probabilities),
+                        record.scraped_at,
+                    ),
+                )
+                if cursor.rowcount:
+                    record.id = cursor.lastrowid
+                    added.append(record)
+        return added
+
+    def query(
+        self,
+        ticker: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[NewsRecord]:
+        """Returns records in publication order, filtered by ticker, time range and/or id."""
+        clauses = []
+        params = []
+        if ticker:
+            clauses.append("ticker = ?")
+            params.append(ticker.upper())
+        if since:
+            clauses.append("published_at >= ?")
+            params.append(since.timestamp())
+        if until:
+            clauses.append("published_at < ?")
+            params.append(until.timestamp())
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+
+        sql = f"SELECT {RECORD_COLUMNS} FROM news"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY published_at, id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [self._to_record(row) for row in self._connection().execute(sql, params)]
+
+    def records_after(self, ticker: str, after_id: int, limit: int) -> List[NewsRecord]:
+        """Returns up to `limit` of a ticker's records with id > after_id, in insertion order."""
+        rows = self._connection().execute(
+            f"SELECT {RECORD_COLUMNS} FROM news WHERE ticker = ? AND id > ? ORDER BY id LIMIT ?",
+            (ticker.upper(), after_id, limit),
+        )
+        return [self._to_record(row) for row in rows]
+
+    def get_progress(self, job: str, ticker: str) -> int:
+        """Returns the id of the last record `job` processed for a ticker (0 if none)."""
+        row = self._connection().execute(
+            "SELECT last_id FROM job_progress WHERE job = ? AND ticker = ?", (job, ticker.upper())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def tickers(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT DISTINCT ticker FROM news ORDER BY ticker")]
+
+    def set_sentiment(self, updates: Iterable[tuple], progress: Optional[tuple] = None) -> None:
+        """
+        Writes (id, label, score, probabilities) sentiment results back onto stored records. `progress`, a
+        (job, ticker, last_id) tuple, advances that job's high-water mark in the same transaction.
+        """
+        db = self._connection()
+        with db:
+            db.executemany(
+                "UPDATE news SET sentiment_label = ?, sentiment_score = ?, sentiment_probabilities = ? WHERE id = ?",
+                [
+                    (label, score, _dump_probabilities(probabilities), record_id)
+                    for record_id, label, score, probabilities in updates
+                ],
+            )
+            if progress is not None:
+                job, ticker, last_id = progress
+                db.execute(
+                    "INSERT INTO job_progress (job, ticker, last_id) VALUES (?, ?, ?) "
+                    "ON CONFLICT (job, ticker) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)",
+                    (job, ticker.upper(), last_id),
+                )
+
+    def delete(self, ticker: Optional[str] = None, before: Optional[datetime] = None) -> int:
+        clauses = []
+        params = []
+        if ticker:
+            clauses.append("ticker = ?")
+            params.append(ticker.upper())
+        if before:
+            clauses.append("published_at < ?")
+            params.append(before.timestamp())
+
+        sql = "DELETE FROM news"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        db = self._connection()
+        with db:
+            return db.execute(sql, params).rowcount
+
+    def expire(self, ticker: str, before: datetime, batch_size: int = 1000) -> int:
+        """
+        Deletes a ticker's records published before `before`, folding them into daily sentiment
+        aggregates first. Works in small transactions so scrapers are never blocked for long.
+        """
+        db = self._connection()
+        total = 0
+        while True:
+            with db:
+                ids = [
+                    row[0] for row in db.execute(
+                        "SELECT id FROM news WHERE ticker = ? AND published_at < ? LIMIT ?",
+                        (ticker.upper(), before.timestamp(), batch_size),
+                    )
+                ]
+                if not ids:
+                    break
+
+                placeholders = ",".join("?" * len(ids))
+                db.execute(
+                    f"""
+                    INSERT INTO daily_sentiment (ticker, day, articles, scored, positive, negative, neutral, score_sum)
+                    SELECT ticker, date(published_at, 'unixepoch', 'localtime') AS day, COUNT(*),
+                           COUNT(sentiment_label), COALESCE(SUM(sentiment_label = 'positive'), 0),
+                           COALESCE(SUM(sentiment_label = 'negative'), 0),
+                           COALESCE(SUM(sentiment_label = 'neutral'), 0),
+                           COALESCE(SUM(sentiment_score), 0)
+                    FROM news WHERE id IN ({placeholders})
+                    GROUP BY ticker, day
+                    ON CONFLICT (ticker, day) DO UPDATE SET
+                        articles = articles + excluded.articles,
+                        scored = scored + excluded.scored,
+                        positive = positive + excluded.positive,
+                        negative = negative + excluded.negative,
+                        neutral = neutral + excluded.neutral,
+                        score_sum = score_sum + excluded.score_sum
+                    """,
+                    ids,
+                )
+                db.execute(f"DELETE FROM news WHERE id IN ({placeholders})", ids)
+            total += len(ids)
+        return total
+
+    def daily_sentiment(self, ticker: str, since: Optional[datetime] = None) -> List[dict]:
+        """Returns the rolled-up per-day sentiment counts kept after raw headlines expire."""
+        sql = (
+            "SELECT day, articles, scored, positive, negative, neutral, score_sum "
+            "FROM daily_sentiment WHERE ticker = ?"
+        )
+        params = [ticker.upper()]
+        if since:
+            sql += " AND day >= ?"
+            params.append(since.date().isoformat())
+        sql += " ORDER BY day"
+
+        return [
+            {
+                "day": day,
+                "articles": articles,
+                "scored": scored,
+                "positive": positive,
+                "negative": negative,
+                "neutral": neutral,
+                "mean_score": score_sum / scored if scored else None,
+            }
+            for day, articles, scored, positive, negative, neutral, score_sum in self._connection().execute(sql, params)
+        ]
+
+    def compact(self, pages: int = 1000) -> None:
+        """Checkpoints the WAL without waiting on writers and returns up to `pages` free pages to the OS."""
+        db = self._connection()
+        db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        db.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+
+    @staticmethod
+    def _to_record(row) -> NewsRecord:
+        return NewsRecord(
+            id=row[0],
+            ticker=row[1],
+            published_at=datetime.fromtimestamp(row[2]),
+            source=row[3],
+            url=row[4],
+            headline=row[5],
+            body=row[6],
+            content_hash=row[7],
+            sentiment_label=row[8],
+            sentiment_score=row[9],
+            scraped_at=row[10],
+            sentiment_probabilities=json.loads(row[11]) if row[11] else None,
+        )
+
+
+news_store = NewsStore(os.getenv("NEWS_STORE_DB", DEFAULT_DB_PATH))
@@ -1,88 +1,149 @@
 from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
-import os
-import schedule
-import time
+import hashlib
+from datetime import datetime, timedelta
+from dedup_index import HeadlineIndex
+from news_store import NewsRecord, news_store
+from retention import RetentionManager, RetentionPolicy
 
 finviz_url = 'https://finviz.com/quote.ashx?t='
 tickers = ['AMZN', 'GOOG', 'DRUG', 'AAPL']
-output_directory = "news"
-data_retention_minutes = 2  
+# How long raw headlines are kept; daily sentiment roll-ups outlive them
+data_retention = RetentionPolicy(default=timedelta(days=30), per_ticker={})
+max_concurrent_fetches = 16
+request_timeout_seconds = 20
 
-if not os.path.exists(output_directory):
-    os.makedirs(output_directory)
+# Per-ticker ETag, Last-Modified and body hash from the previous fetch
+fetch_state = {}
 
+headline_index = HeadlineIndex(news_store.db_path)
+retention_manager = RetentionManager(news_store, data_retention, index=headline_index)
 
-def scrape_stock_news():
+
+def fetch_ticker_page(ticker):
     """
-    Scrapes stock news from Finviz for the given tickers and saves it to text files.
+    Fetches the Finviz page for a ticker, returning None when the server reports it unchanged
+    (304) or the body hashes to the same value as the previous fetch.
     """
-    print("Starting news scraping...")
-
-    for ticker in tickers:
-        url = finviz_url + ticker
+    url = finviz_url + ticker
+    state = fetch_state.setdefault(ticker, {})
 
-        req = Request(url=url, headers={'user-agent': 'my-app'})
-        response = urlopen(req)
+    headers = {'user-agent': 'my-app'}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
 
-        html = BeautifulSoup(response, features='html.parser')
-        news_table = html.find(id='news-table')
+    try:
+        response = urlopen(Request(url=url, headers=headers), timeout=request_timeout_seconds)
+    except HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
 
-        file_path = f"{output_directory}/{ticker}_news.txt"
+    body = response.read()
+    state['etag'] = response.headers.get('ETag')
+    state['last_modified'] = response.headers.get('Last-Modified')
 
-        if news_table:
-            with open(file_path, 'a') as file: 
-                for row in news_table.findAll('tr'):
-                    title = row.a.text
-                    date_data = row.td.text.split(' ')
+    body_hash = hashlib.sha256(body).hexdigest()
+    if body_hash == state.get('body_hash'):
+        return None
+    state['body_hash'] = body_hash
 
-                    if len(date_data) == 1:
-                        time = date_data[0]
-                        date = None  
-                    else:
-                        date = date_data[0]
-                        time = date_data[1]
-
-                    news_entry = f"Date: {date}, Time: {time}, Headline: {title}\n"
-
-                    if news_entry not in open(file_path).read():
-                        file.write(news_entry)
-
-    print("News data scraped and saved.")
+    return body
 
 
-def remove_old_files():
+def parse_finviz_timestamp(date, time_text):
     """
-    Periodically removes text files after a certain interval, independent of their modification or creation time.
+    Parses Finviz's "Oct-10-24" / "Today" date and "12:20PM" time cells, falling back to now.
     """
-    print(f"Deleting all files in the '{output_directory}' folder...")
+    try:
+        day = datetime.now().date() if date in (None, 'Today') else datetime.strptime(date, '%b-%d-%y').date()
+        return datetime.combine(day, datetime.strptime(time_text, '%I:%M%p').time())
+    except ValueError:
+        return datetime.now()
 
-    for ticker in tickers:
-        file_path = f"{output_directory}/{ticker}_news.txt"
 
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"Deleted: {file_path}")
+def parse_news_table(ticker, body):
+    """
+    Turns the rows of a Finviz news table into news records. Rows that only show a time
+    belong to the date of the last row that showed one.
+    """
+    html = BeautifulSoup(body, features='html.parser')
+    news_table = html.find(id='news-table')
+    if not news_table:
+        return []
+
+    records = []
+    date = None
+    for row in news_table.findAll('tr'):
+        if row.a is None or row.td is None:
+            continue
+        title = row.a.text
+        date_data = row.td.text.strip().split()
+
+        if len(date_data) == 1:
+            time = date_data[0]
         else:
-            print(f"File {file_path} does not exist.")
+            date = date_data[0]
+            time = date_data[1]
 
-    print("Old files cleaned up.")
+        records.append(NewsRecord(
+            ticker=ticker,
+            published_at=parse_finviz_timestamp(date, time),
+            source='finviz',
+            url=urljoin(finviz_url, row.a.get('href', '')),
+            headline=title,
+        ))
 
+    return records
 
-def run_periodic_scraping():
+
+def scrape_stock_news():
     """
-    Schedule the scraping and cleanup jobs to run at regular intervals.
+    Scrapes stock news from Finviz for the given tickers and appends new headlines to the news store.
     """
-    schedule.every(1).minutes.do(scrape_stock_news)
+    print("Starting news scraping...")
 
-    schedule.every(2).minutes.do(remove_old_files)
+    with ThreadPoolExecutor(max_workers=max_concurrent_fetches) as executor:
+        futures = {executor.submit(fetch_ticker_page, ticker): ticker for ticker in tickers}
+        pages = {}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                pages[ticker] = future.result()
+            except Exception as e:
+                print(f"Failed to fetch news for {ticker}: {e}")
+
+    for ticker, body in pages.items():
+        if body is None:
+            print(f"No changes for {ticker}")
+            continue
+
+        headline_index.load(ticker, seed=lambda: [r.content_hash for r in news_store.query(ticker=ticker)])
+        new_records = [
+            record for record in parse_news_table(ticker, body)
+            if headline_index.is_new(ticker, record.content_hash)
+        ]
+
+        try:
+            added = news_store.add(new_records)
+        except Exception as e:
+            # Forget the page hash so the next run re-parses it instead of skipping it as unchanged
+            fetch_state.pop(ticker, None)
+            print(f"Failed to store news for {ticker}: {e}")
+            continue
+
+        # Only mark headlines seen once they are stored, so a failed insert is retried next run
+        headline_index.mark_seen(ticker, [record.content_hash for record in new_records])
+        print(f"{ticker}: {len(added)} new headlines")
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)  
+    print("News data scraped and saved.")
 
 
 if __name__ == "__main__":
+    # One-shot scrape; pipeline.py runs scraping, scoring and retention continuously
     scrape_stock_news()
-
-    run_periodic_scraping()
@@ -1,85 +1,96 @@
-from typing import List
-from transformers import pipeline, AutoTokenizer
-import torch
-import os
+import time
+from model_registry import registry
+from sentiment_analysis import SentimentAnalysis as BaseSentimentAnalysis
+from news_store import news_store
 
+JOB_NAME = "sentiment"
+DEFAULT_BATCH_SIZE = 256
 
-class SentimentAnalysis:
-    def __init__(self, text: List[str]):
-        self.text = text
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            "mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis"
-        )
 
+class SentimentAnalysis(BaseSentimentAnalysis):
     def sentiment_analysis(self):
-        device = 0 if torch.cuda.is_available() else -1
-        pipe = pipeline(
-            "text-classification",
-            model="mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis",
-            device=device,
-        )
-
-        max_token_length = self.tokenizer.model_max_length
+        # One aggregated score per headline, scored from token windows in padded batches
         results = []
-
-        for text_item in self.text:
-            # Split into chunks
-            chunks = self.split_into_chunks(text_item, max_token_length)
-            for chunk in chunks:
-                sentiment_result = pipe(chunk)
-                results.append({
-                    'headline': chunk,
-                    'label': sentiment_result[0]['label'],
-                    'score': sentiment_result[0]['score']
-                })
+        for headline, sentiment_result in zip(self.text, super().sentiment_analysis()):
+            results.append({
+                'headline': headline,
+                'label': sentiment_result['label'],
+                'score': sentiment_result['score'],
+                'probabilities': sentiment_result.get('probabilities'),
+            })
 
         return results
 
-    def split_into_chunks(self, text, max_length=512):
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True)
-        input_ids = inputs["input_ids"][0]
 
-        # Create chunks
-        chunks = []
-        for i in range(0, len(input_ids), max_length):
-            chunk_ids = input_ids[i: i + max_length]
-            chunk_text = self.tokenizer.decode(chunk_ids, skip_special_tokens=True)
-            chunks.append(chunk_text)
+def display_label(result):
+    label = result['label']
+    score = result['score']
+
+    if label == 'neutral':
+        if score < 0.3:  
+            label = 'slightly negative'
+        elif score > 0.7: 
+            label = 'slightly positive'
+        else:
+            label = 'neutral'
+
+    if 'strongly' in result['headline']:
+        label = 'strongly positive' if 'rise' in result['headline'] else 'strongly negative'
+
+    return label
+
+
+def analyze_ticker_news(tickers=None, store=news_store, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Scores only headlines stored since the last run, tracking a per-ticker high-water mark
+    in the store so the cost of a cycle follows the amount of new data.
+    """
+    scored = {}
+    for ticker in tickers or store.tickers():
+        last_id = store.get_progress(JOB_NAME, ticker)
+        scored[ticker] = 0
 
-        return chunks
+        while True:
+            records = store.records_after(ticker, last_id, batch_size)
+            if not records:
+                break
 
-def analyze_ticker_files(tickers, news_directory):
-    for ticker in tickers:
-        file_path = f"{news_directory}/{ticker}_news.txt"
-        
-        if os.path.exists(file_path):
-            print(f"\nSentiment analysis for {ticker}:\n{'=' * 40}")
-            
-            with open(file_path, 'r') as file:
-                news_text = file.readlines()
+            last_id = records[-1].id
+            # Records stored by the pipeline arrive already scored
+            records = [record for record in records if record.sentiment_label is None]
+            if not records:
+                store.set_sentiment([], progress=(JOB_NAME, ticker, last_id))
+                continue
 
-            sentiment_analyzer = SentimentAnalysis(news_text)
-            results = sentiment_analyzer.sentiment_analysis()
+            if not scored[ticker]:
+                print(f"\nSentiment analysis for {ticker}:\n{'=' * 40}")
+
+            results = SentimentAnalysis([record.text for record in records]).sentiment_analysis()
+
+            # Store the raw model output; the adjusted label is only for display
+            store.set_sentiment(
+                [
+                    (record.id, result['label'], result['score'], result['probabilities'])
+                    for record, result in zip(records, results)
+                ],
+                progress=(JOB_NAME, ticker, last_id),
+            )
+            scored[ticker] += len(records)
 
             for result in results:
                 if result['headline'].strip():
-                    label = result['label']
-                    score = result['score']
-                    
-                    if label == 'neutral':
-                        if score < 0.3:  
-                            label = 'slightly negative'
-                        elif score > 0.7: 
-                            label = 'slightly positive'
-                        else:
-                            label = 'neutral'
-                    
-                    if 'strongly' in result['headline']:
-                        label = 'strongly positive' if 'rise' in result['headline'] else 'strongly negative'
-                    
-                    print(f"Headline: {result['headline']}, Sentiment: {label}, Score: {score:.2f}")
+                    print(f"Headline: {result['headline']}, Sentiment: {display_label(result)}, Score: {result['score']:.2f}")
+
+    return scored
+
+
+def run_forever(tickers=None, interval_seconds=60):
+    while True:
+        scored = analyze_ticker_news(tickers)
+        print(f"Scored {sum(scored.values())} new headlines: {scored}")
+        time.sleep(interval_seconds)
+
 
 if __name__ == "__main__":
-    news_directory = "news" 
-    tickers = ['AMZN', 'GOOG', 'DRUG', 'AAPL'] 
-    analyze_ticker_files(tickers, news_directory)
+    registry.warm_up()
+    run_forever()
@@ -0,0 +1,313 @@
+import argparse
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from news_store import news_store
+from periodic_scraper import fetch_ticker_page, fetch_state, headline_index, parse_news_table, retention_manager, tickers
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_INTERVAL_SECONDS = 60
+METRICS_LOG_SECONDS = 60
+
+
+def _init_inference_worker():
+    from model_registry import registry
+
+    registry.warm_up()
+
+
+def _score_texts(texts):
+    from sentiment_analysis import SentimentAnalysis
+
+    return SentimentAnalysis(texts).sentiment_analysis()
+
+
+class StageMetrics:
+    """Throughput and queue lag for one pipeline stage."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, lags, outputs, busy_seconds, failed=False):
+        with self._lock:
+            self.items_in += len(lags)
+            self.items_out += outputs
+            self.batches += 1
+            self.errors += int(failed)
+            self.busy_seconds += busy_seconds
+            self.lag_seconds += sum(lags)
+            self.max_lag_seconds = max([self.max_lag_seconds, *lags])
+
+    def snapshot(self, queue_depth):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "batches": self.batches,
+                "errors": self.errors,
+                "throughput_per_second": round(self.items_in / elapsed, 3),
+                "busy_seconds": round(self.busy_seconds, 3),
+                "mean_lag_seconds": round(self.lag_seconds / self.items_in, 3) if self.items_in else 0.0,
+                "max_lag_seconds": round(self.max_lag_seconds, 3),
+                "queue_depth": queue_depth,
+            }
+
+
+class Stage:
+    """
+    A pool of worker threads reading from a bounded input queue. Each worker takes up to
+    `batch_size` items (waiting at most `max_wait` seconds to fill a batch), calls fn(batch)
+    and puts every returned item on the next stage. A full downstream queue blocks the
+    workers, which is how backpressure travels up the pipeline.
+    """
+
+    def __init__(self, name, fn, workers=1, maxsize=DEFAULT_QUEUE_SIZE, batch_size=1, max_wait=0.0):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.metrics = StageMetrics()
+        self.downstream = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def put(self, item, timeout=None):
+        self.queue.put((time.monotonic(), item), timeout=timeout)
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stops the workers once they have drained the input queue into the next stage."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _take_batch(self):
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._take_batch()
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            lags = [started - enqueued_at for enqueued_at, _ in batch]
+            try:
+                outputs = list(self.fn([item for _, item in batch]) or [])
+            except Exception as e:
+                logging.error(f"Pipeline stage {self.name} failed: {e}")
+                self.metrics.record(lags, 0, time.monotonic() - started, failed=True)
+                continue
+
+            self.metrics.record(lags, len(outputs), time.monotonic() - started)
+            if self.downstream is not None:
+                for output in outputs:
+                    if not self._forward(output):
+                        return
+
+    def _forward(self, output):
+        """Waits for room downstream, giving up only if the downstream stage has already stopped."""
+        while True:
+            try:
+                self.downstream.put(output, timeout=0.5)
+                return True
+            except queue.Full:
+                if self.downstream._stop.is_set() and not self.downstream._threads:
+                    logging.error(f"Pipeline stage {self.downstream.name} stopped; dropping output of {self.name}")
+                    return False
+
+
+class PipelineRunner:
+    """Runs fetch -> parse -> dedup -> sentiment -> store/embed as connected stages with bounded queues."""
+
+    def __init__(
+        self,
+        watchlist=None,
+        interval_seconds=DEFAULT_INTERVAL_SECONDS,
+        fetch_workers=16,
+        inference_processes=1,
+        sentiment_batch_size=64,
+        embed=False,
+        store=news_store,
+    ):
+        self.watchlist = list(watchlist or tickers)
+        self.interval_seconds = interval_seconds
+        self.embed = embed
+        self.store = store
+        self.inference_processes = inference_processes
+        self.inference_pool = self._new_inference_pool()
+        self._pool_lock = threading.Lock()
+
+        self.stages = [
+            Stage("fetch", self._fetch, workers=fetch_workers),
+            Stage("parse", self._parse, workers=2),
+            Stage("dedup", self._dedup, workers=1, batch_size=256),
+            Stage("sentiment", self._sentiment, workers=inference_processes, batch_size=sentiment_batch_size, max_wait=0.5),
+            Stage("store", self._store, workers=1, batch_size=256, max_wait=0.5),
+        ]
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.downstream = downstream
+        self._stop = threading.Event()
+
+    def _new_inference_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.inference_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_inference_worker,
+        )
+
+    def _fetch(self, batch):
+        pages = []
+        for ticker in batch:
+            body = fetch_ticker_page(ticker)
+            if body is not None:
+                pages.append((ticker, body))
+        return pages
+
+    def _parse(self, batch):
+        return [record for ticker, body in batch for record in parse_news_table(ticker, body)]
+
+    def _dedup(self, batch):
+        # Only checks the index; hashes are recorded once the store stage has saved the records
+        new_records = []
+        for record in batch:
+            headline_index.load(record.ticker, seed=lambda: [r.content_hash for r in self.store.query(ticker=record.ticker)])
+            if headline_index.is_new(record.ticker, record.content_hash):
+                new_records.append(record)
+        return new_records
+
+    def _score(self, texts):
+        """Scores texts in the inference pool, replacing the pool once if a worker process died."""
+        pool = self.inference_pool
+        try:
+            return pool.submit(_score_texts, texts).result()
+        except BrokenProcessPool:
+            logging.warning("Inference process died; restarting the pool and retrying the batch")
+            with self._pool_lock:
+                if self.inference_pool is pool:
+                    self.inference_pool = self._new_inference_pool()
+                    pool.shutdown(wait=False)
+            return self.inference_pool.submit(_score_texts, texts).result()
+
+    def _sentiment(self, batch):
+        try:
+            results = self._score([record.text for record in batch])
+        except Exception as e:
+            # Store the records unscored; the sentiment job picks them up from the store later
+            logging.error(f"Scoring {len(batch)} headlines failed, storing them unscored: {e}")
+            return batch
+
+        for record, result in zip(batch, results):
+            record.sentiment_label = result["label"]
+            record.sentiment_score = result["score"]
+            record.sentiment_probabilities = result.get("probabilities")
+        return batch
+
+    def _store(self, batch):
+        try:
+            added = self.store.add(batch)
+        except Exception:
+            # Re-parse these pages next cycle instead of skipping them as unchanged
+            for ticker in {record.ticker for record in batch}:
+                fetch_state.pop(ticker, None)
+            raise
+
+        by_ticker = {}
+        for record in batch:
+            by_ticker.setdefault(record.ticker, []).append(record.content_hash)
+        for ticker, hashes in by_ticker.items():
+            headline_index.mark_seen(ticker, hashes)
+
+        if self.embed and added:
+            from rag_ingest import ingest_store
+
+            ingest_store(self.store, tickers=sorted({record.ticker for record in added}))
+        return []
+
+    def metrics(self):
+        return {stage.name: stage.metrics.snapshot(stage.queue.qsize()) for stage in self.stages}
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        retention_manager.start()
+
+    def stop(self):
+        """Stops the stages upstream first, so every record already in flight reaches the store."""
+        self._stop.set()
+        retention_manager.stop()
+        for stage in self.stages:
+            stage.stop()
+        self.inference_pool.shutdown()
+
+    def run_forever(self):
+        """Feeds the watchlist into the fetch stage every interval and logs stage metrics."""
+        self.start()
+        last_metrics_log = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                cycle_started = time.monotonic()
+                for ticker in self.watchlist:
+                    if self._stop.is_set():
+                        break
+                    # Blocks while the fetch queue is full, so a slow pipeline slows the producer down
+                    self.stages[0].put(ticker)
+
+                if time.monotonic() - last_metrics_log >= METRICS_LOG_SECONDS:
+                    logging.info(f"Pipeline metrics: {self.metrics()}")
+                    last_metrics_log = time.monotonic()
+
+                self._stop.wait(max(self.interval_seconds - (time.monotonic() - cycle_started), 0))
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run the scrape -> score -> store pipeline.")
+    parser.add_argument("tickers", nargs="*", default=tickers)
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL_SECONDS)
+    parser.add_argument("--inference-processes", type=int, default=1)
+    parser.add_argument("--embed", action="store_true", help="index newly stored news for the chatbot")
+    args = parser.parse_args()
+
+    PipelineRunner(
+        args.tickers,
+        interval_seconds=args.interval,
+        inference_processes=args.inference_processes,
+        embed=args.embed,
+    ).run_forever()
@@ -0,0 +1,161 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from metrics import timer
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_SEMANTIC_ENTRIES = 512
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases and collapses whitespace/trailing punctuation so trivially different questions match."""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Wraps an embedding model, remembering query embeddings so repeated questions skip the API call."""
+
+    def __init__(self, inner: Embeddings, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.inner = inner
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with timer("embedding"):
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_question(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        with timer("embedding"):
+            vector = self.inner.embed_query(text)
+        with self._lock:
+            self._entries[key] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class AnswerCache:
+    """Exact-match answers keyed on (normalized question, filters, index version), plus an optional semantic tier.
+
+    The semantic tier returns a stored answer when a new question's embedding lies within
+    `semantic_distance` (cosine distance) of an earlier one with the same filters. Everything is
+    dropped whenever the index version changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        semantic_distance: Optional[float] = None,
+        semantic_entries: int = DEFAULT_SEMANTIC_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.semantic_distance = semantic_distance
+        self.semantic_entries = semantic_entries
+        self.version = None
+        self._answers = OrderedDict()
+        self._semantic = []
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_distance is not None
+
+    def sync_version(self, version) -> None:
+        """Clears every entry if the index changed since answers were cached."""
+        with self._lock:
+            if version != self.version:
+                self._answers.clear()
+                self._semantic.clear()
+                self.version = version
+
+    def get(self, question: str, filters: tuple, embedding: Optional[List[float]] = None) -> Optional[str]:
+        key = (normalize_question(question), filters)
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is not None:
+                self._answers.move_to_end(key)
+                self.exact_hits += 1
+                return answer
+
+            if embedding is not None and self.semantic_enabled:
+                answer = self._find_similar(embedding, filters)
+                if answer is not None:
+                    self.semantic_hits += 1
+                    return answer
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        question: str,
+        filters: tuple,
+        answer: str,
+        embedding: Optional[List[float]] = None,
+        version=None,
+    ) -> None:
+        """Stores an answer; one built against an index `version` that is no longer current is dropped."""
+        key = (normalize_question(question), filters)
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._answers[key] = answer
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+            if embedding is not None and self.semantic_enabled:
+                self._semantic.append((_unit(embedding), filters, answer))
+                del self._semantic[: -self.semantic_entries]
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "entries": len(self._answers),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
+
+    def _find_similar(self, embedding, filters):
+        import numpy as np
+
+        candidates = [(vector, answer) for vector, entry_filters, answer in self._semantic if entry_filters == filters]
+        if not candidates:
+            return None
+
+        matrix = np.stack([vector for vector, _ in candidates])
+        distances = 1.0 - matrix @ _unit(embedding)
+        best = int(distances.argmin())
+        if distances[best] <= self.semantic_distance:
+            return candidates[best][1]
+        return None
+
+
+def _unit(vector):
+    import numpy as np
+
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
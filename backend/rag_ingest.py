@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import logging
+import os
+from datetime import datetime
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from bot import bump_index_version, rag_service
+from news_store import news_store
+
+DEFAULT_NEWS_FILE = "news_file.csv"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_news(text, source, ticker=None, published_at=None):
+    """Splits a news text into documents whose IDs derive from their source and content."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    documents = []
+    ids = []
+    seen = set()
+
+    for chunk_index, chunk in enumerate(splitter.split_text(text)):
+        digest = content_hash(chunk)
+        doc_id = f"{source}:{digest[:32]}"
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        ids.append(doc_id)
+        metadata = {"source": source, "chunk_index": chunk_index, "content_hash": digest}
+        if ticker:
+            metadata["ticker"] = ticker.upper()
+        if published_at:
+            metadata["published_ts"] = int(published_at.timestamp())
+        documents.append(Document(page_content=chunk, metadata=metadata))
+
+    return documents, ids
+
+
+def ingest_documents(db, source, documents, ids):
+    """
+    Embeds documents not yet in the index and drops chunks that no longer exist in the source.
+    Unchanged chunks whose metadata moved on (a newer published_ts, a shifted chunk_index) have
+    their metadata updated in place without being embedded again.
+    """
+    stored = db.get(where={"source": source}, include=["metadatas"])
+    existing = dict(zip(stored["ids"], stored["metadatas"]))
+    new_pairs = [(doc, doc_id) for doc, doc_id in zip(documents, ids) if doc_id not in existing]
+    updated = [(doc, doc_id) for doc, doc_id in zip(documents, ids)
+               if doc_id in existing and existing[doc_id] != doc.metadata]
+    stale_ids = sorted(existing.keys() - set(ids))
+
+    if new_pairs:
+        db.add_documents([doc for doc, _ in new_pairs], ids=[doc_id for _, doc_id in new_pairs])
+    if updated:
+        db._collection.update(ids=[doc_id for _, doc_id in updated], metadatas=[doc.metadata for doc, _ in updated])
+    if stale_ids:
+        db.delete(ids=stale_ids)
+    if new_pairs or updated or stale_ids:
+        bump_index_version()
+
+    unchanged = len(ids) - len(new_pairs) - len(updated)
+    logging.info(
+        f"Ingested {source}: {len(new_pairs)} added, {len(updated)} updated, {len(stale_ids)} removed, "
+        f"{unchanged} unchanged"
+    )
+    return {"added": len(new_pairs), "updated": len(updated), "removed": len(stale_ids), "unchanged": unchanged}
+
+
+def purge_legacy_documents(db):
+    """Deletes documents added before ingestion tracked sources (the duplicated whole-file copies)."""
+    stored = db.get(include=["metadatas"])
+    legacy_ids = [
+        doc_id for doc_id, metadata in zip(stored["ids"], stored["metadatas"])
+        if not metadata or "source" not in metadata
+    ]
+    if legacy_ids:
+        db.delete(ids=legacy_ids)
+        bump_index_version()
+    logging.info(f"Purged {len(legacy_ids)} legacy documents")
+    return len(legacy_ids)
+
+
+def ingest_file(path=DEFAULT_NEWS_FILE, db=None, ticker=None):
+    """Indexes a news file, embedding only chunks whose content changed since the last run."""
+    db = db or rag_service.db
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    source = os.path.basename(path)
+    published_at = datetime.fromtimestamp(os.path.getmtime(path))
+    documents, ids = chunk_news(text, source, ticker=ticker, published_at=published_at)
+    return ingest_documents(db, source, documents, ids)
+
+
+def ingest_store(store=news_store, db=None, tickers=None):
+    """Indexes stored news records per ticker; each record is one document identified by its content hash."""
+    db = db or rag_service.db
+    totals = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+    for ticker in tickers or store.tickers():
+        documents = []
+        ids = []
+        for record in store.query(ticker=ticker):
+            ids.append(f"news:{record.ticker}:{record.content_hash[:32]}")
+            documents.append(
+                Document(
+                    page_content=record.text,
+                    metadata={
+                        "source": f"news_store:{record.ticker}",
+                        "ticker": record.ticker,
+                        "published_ts": int(record.published_at.timestamp()),
+                        "url": record.url or "",
+                        "content_hash": record.content_hash,
+                    },
+                )
+            )
+
+        counts = ingest_documents(db, f"news_store:{ticker}", documents, ids)
+        for key in totals:
+            totals[key] += counts[key]
+
+    return totals
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Incrementally index news into the Chroma store.")
+    parser.add_argument("paths", nargs="*", default=[])
+    parser.add_argument("--store", action="store_true", help="index the structured news store")
+    parser.add_argument("--ticker", help="ticker the news files are about, stored as filterable metadata")
+    parser.add_argument("--purge-legacy", action="store_true", help="remove documents without source metadata first")
+    args = parser.parse_args()
+
+    store = rag_service.db
+    if args.purge_legacy:
+        purge_legacy_documents(store)
+    for news_path in args.paths:
+        print(ingest_file(news_path, store, ticker=args.ticker))
+    if args.store or not args.paths:
+        print(ingest_store(db=store, tickers=[args.ticker] if args.ticker else None))
@@ -0,0 +1,78 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from news_store import news_store
+
+DEFAULT_RETENTION = timedelta(days=30)
+DEFAULT_INTERVAL_SECONDS = 10 * 60
+
+
+class RetentionPolicy:
+    """How long raw headlines are kept, with optional per-ticker overrides."""
+
+    def __init__(self, default=DEFAULT_RETENTION, per_ticker=None):
+        self.default = default
+        self.per_ticker = {ticker.upper(): window for ticker, window in (per_ticker or {}).items()}
+
+    def window_for(self, ticker):
+        return self.per_ticker.get(ticker.upper(), self.default)
+
+
+class RetentionManager:
+    """
+    Expires raw headlines older than each ticker's retention window, keeping daily sentiment
+    roll-ups, and compacts the store in a background thread. When given the scrapers' headline
+    index, hashes first seen before the same window are pruned from it too.
+    """
+
+    def __init__(self, store=news_store, policy=None, interval_seconds=DEFAULT_INTERVAL_SECONDS, index=None):
+        self.store = store
+        self.policy = policy or RetentionPolicy()
+        self.index = index
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, now=None):
+        """Expires and compacts once, returning the number of records removed per ticker."""
+        now = now or datetime.now()
+        removed = {}
+        for ticker in self.store.tickers():
+            count = self.store.expire(ticker, now - self.policy.window_for(ticker))
+            if count:
+                removed[ticker] = count
+
+        if self.index is not None:
+            pruned = sum(
+                self.index.prune(ticker, now - self.policy.window_for(ticker)) for ticker in self.index.tickers()
+            )
+            if pruned:
+                logging.info(f"Retention pruned {pruned} headline hashes")
+
+        if removed:
+            logging.info(f"Retention expired {sum(removed.values())} headlines: {removed}")
+            self.store.compact()
+        return removed
+
+    def start(self):
+        """Runs retention every interval_seconds in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="news-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Retention run failed: {e}")
+            self._stop.wait(self.interval_seconds)
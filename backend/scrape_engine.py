@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import queue
+import time
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_HOST_INTERVAL_SECONDS = 1.0
+DEFAULT_LINKS_PER_TICKER = 5
+DEFAULT_TIMEOUT_SECONDS = 20
+USER_AGENT = "Mozilla/5.0 (compatible; sap-stock-scraper)"
+
+
+def extract_body_content(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    body_content = soup.find_all("p")
+    if body_content:
+        return "".join(p.get_text() for p in body_content)
+    return ""
+
+
+def clean_body_content(body_content):
+    soup = BeautifulSoup(body_content, "html.parser")
+
+    for script_or_style in soup(["script", "style"]):
+        script_or_style.extract()
+
+    cleaned_content = soup.get_text(separator="\n")
+    cleaned_content = " ".join(
+        line.strip() for line in cleaned_content.splitlines() if line.strip()
+    )
+
+    return cleaned_content
+
+
+def split_dom_content(dom_content, max_length=6000):
+    return [
+        dom_content[i : i + max_length]
+        for i in range(0, len(dom_content), max_length)
+    ]
+
+
+def extract_title(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    return soup.title.get_text(strip=True) if soup.title else ""
+
+
+def extract_news_links(html_content, base_url, limit=DEFAULT_LINKS_PER_TICKER):
+    soup = BeautifulSoup(html_content, "html.parser")
+    links = soup.find_all("a", class_="tab-link-news", limit=limit)
+    return [urljoin(base_url, link.get("href")) for link in links if link.get("href")]
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least `interval` seconds."""
+
+    def __init__(self, interval=DEFAULT_HOST_INTERVAL_SECONDS):
+        self.interval = interval
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        host = urlparse(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BrowserPool:
+    """A few headless Chrome instances, started lazily and shared by JS-heavy pages."""
+
+    def __init__(self, size=2):
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = asyncio.Lock()
+
+    def _launch(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--enable-unsafe-swiftshader")
+        return webdriver.Chrome(options=options)
+
+    def _render(self, driver, url):
+        driver.get(url)
+        return driver.page_source
+
+    async def render(self, url):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                self._idle.put(await loop.run_in_executor(None, self._launch))
+
+        driver = await loop.run_in_executor(None, self._idle.get)
+        try:
+            return await loop.run_in_executor(None, self._render, driver, url)
+        finally:
+            self._idle.put(driver)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get().quit()
+        self._created = 0
+
+
+class ScrapeEngine:
+    """Scrapes news for many tickers at once: static pages over async HTTP, JS-heavy pages in a browser pool."""
+
+    def __init__(
+        self,
+        site,
+        concurrency=DEFAULT_CONCURRENCY,
+        host_interval=DEFAULT_HOST_INTERVAL_SECONDS,
+        js_hosts=(),
+        browser_pool_size=2,
+        links_per_ticker=DEFAULT_LINKS_PER_TICKER,
+        timeout=DEFAULT_TIMEOUT_SECONDS,
+    ):
+        self.site = site
+        self.concurrency = concurrency
+        self.rate_limiter = HostRateLimiter(host_interval)
+        self.js_hosts = set(js_hosts)
+        self.browser_pool = BrowserPool(browser_pool_size) if browser_pool_size else None
+        self.links_per_ticker = links_per_ticker
+        self.timeout = timeout
+
+    async def fetch(self, session, semaphore, url):
+        """Returns the page HTML, rendering it in a browser when its host needs JavaScript or HTTP comes back empty."""
+        host = urlparse(url).netloc
+        # Wait for the host's slot before taking a concurrency slot, so a busy host cannot hold them all while sleeping
+        await self.rate_limiter.wait(url)
+        async with semaphore:
+            if host in self.js_hosts and self.browser_pool is not None:
+                return await self.browser_pool.render(url)
+
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    html = await response.text()
+            except Exception as e:
+                logging.warning(f"HTTP fetch failed for {url}: {e}")
+                html = ""
+
+            if not extract_body_content(html) and self.browser_pool is not None and not url.startswith(self.site):
+                logging.info(f"No static content at {url}, rendering with a browser")
+                return await self.browser_pool.render(url)
+            return html
+
+    async def scrape_ticker(self, session, semaphore, ticker):
+        listing_url = self.site + ticker
+        listing_html = await self.fetch(session, semaphore, listing_url)
+        links = extract_news_links(listing_html, listing_url, self.links_per_ticker)
+
+        pages = await asyncio.gather(*(self.fetch(session, semaphore, link) for link in links))
+        results = []
+        for link, html in zip(links, pages):
+            content = clean_body_content(extract_body_content(html))
+            results.append({
+                "ticker": ticker,
+                "link": link,
+                "title": extract_title(html),
+                "content": split_dom_content(content),
+            })
+        return results
+
+    async def scrape(self, tickers):
+        """Scrapes every ticker concurrently, returning one {ticker, link, title, content} record per article."""
+        import aiohttp
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        try:
+            async with aiohttp.ClientSession(timeout=timeout, headers={"User-Agent": USER_AGENT}) as session:
+                per_ticker = await asyncio.gather(
+                    *(self.scrape_ticker(session, semaphore, ticker) for ticker in tickers),
+                    return_exceptions=True,
+                )
+        finally:
+            if self.browser_pool is not None:
+                self.browser_pool.close()
+
+        results = []
+        for ticker, ticker_results in zip(tickers, per_ticker):
+            if isinstance(ticker_results, Exception):
+                logging.error(f"Scraping failed for {ticker}: {ticker_results}")
+                continue
+            results.extend(ticker_results)
+        return results
+
+    def run(self, tickers):
+        return asyncio.run(self.scrape(tickers))
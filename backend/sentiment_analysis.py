@@ -1,44 +1,146 @@
 from typing import List
-from transformers import pipeline, AutoTokenizer
-import torch
+from metrics import BATCH_SIZE_BUCKETS, metrics, timer
+from model_registry import registry, SENTIMENT_MODEL_NAME
+from sentiment_cache import sentiment_cache
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_BATCH_TOKENS = 8192
+DEFAULT_WINDOW_STRIDE = 64
 
 
 class SentimentAnalysis:
-    def __init__(self, text: list):
+    def __init__(
+        self,
+        text: list,
+        model_name: str = SENTIMENT_MODEL_NAME,
+        batched: bool = True,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+        stride: int = DEFAULT_WINDOW_STRIDE,
+        cache=sentiment_cache,
+    ):
         self.text = text
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            "mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis"
-        )
+        self.cache = cache
+        self.model = registry.get(model_name)
+        # Precision is part of the key so INT8 scores are never served as fp32 ones (or vice versa)
+        self.model_id = f"{model_name}:{self.model.backend.name}:{self.model.backend.precision}"
+        self.tokenizer = self.model.tokenizer
+        self.batched = batched
+        self.max_batch_size = max_batch_size if batched else 1
+        self.max_batch_tokens = max_batch_tokens
+        self.stride = stride
 
     def sentiment_analysis(self):
-        device = 0 if torch.cuda.is_available() else -1
-        pipe = pipeline(
-            "text-classification",
-            model="mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis",
-            device=device,
-        )
+        """Scores each document once, aggregating over its token windows; cached documents skip inference."""
+        results = [None] * len(self.text)
+        pending = []
+
+        for doc_index, text_item in enumerate(self.text):
+            cached = self.cache.get(self.model_id, text_item) if self.cache is not None else None
+            if cached is not None:
+                results[doc_index] = cached
+            else:
+                pending.append(doc_index)
+
+        if pending:
+            scored = self.score_documents([self.text[i] for i in pending])
+            for doc_index, result in zip(pending, scored):
+                results[doc_index] = result
+                if self.cache is not None:
+                    self.cache.put(self.model_id, self.text[doc_index], result)
+
+        return results
 
+    def score_documents(self, texts: List[str]):
+        """Runs inference for texts, returning one aggregated result per text."""
         max_token_length = self.tokenizer.model_max_length
-        results = []
+        windows = []
+        owners = []
+
+        with timer("tokenization"):
+            for doc_index, text_item in enumerate(texts):
+                for window in self.split_into_windows(text_item, max_token_length):
+                    windows.append(window)
+                    owners.append(doc_index)
+
+        probabilities = self.predict_windows(windows)
+        return self.aggregate(windows, owners, probabilities, len(texts))
+
+    def predict_windows(self, windows: List[List[int]]):
+        """Runs token-ID windows through the model backend in padded batches, returning class probabilities in input order."""
+        results = [None] * len(windows)
 
-        for text_item in self.text:
-            chunks = self.split_into_chunks(text_item, max_token_length)
-            for chunk in chunks:
-                results.extend(pipe(chunk))
+        for batch_indices in self.make_batches([len(ids) for ids in windows]):
+            metrics.observe("batch_size", len(batch_indices), buckets=BATCH_SIZE_BUCKETS, batcher="model")
+            with timer("inference"):
+                probabilities = self.model.predict([windows[i] for i in batch_indices])
+            for i, row in zip(batch_indices, probabilities):
+                results[i] = row
 
         return results
 
-    def split_into_chunks(self, text, max_length=512):
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True)
-        input_ids = inputs["input_ids"][0]
+    def aggregate(self, windows, owners, probabilities, doc_count):
+        """Combines window probabilities into one result per document, weighting by window length."""
+        id2label = self.model.config.id2label
+        totals = [None] * doc_count
+        weights = [0] * doc_count
+
+        for window, doc_index, row in zip(windows, owners, probabilities):
+            weight = len(window)
+            if totals[doc_index] is None:
+                totals[doc_index] = [0.0] * len(row)
+            totals[doc_index] = [t + p * weight for t, p in zip(totals[doc_index], row)]
+            weights[doc_index] += weight
+
+        results = []
+        for total, weight in zip(totals, weights):
+            mean = [t / weight for t in total]
+            label_id = max(range(len(mean)), key=mean.__getitem__)
+            results.append({
+                "label": id2label[label_id],
+                "score": mean[label_id],
+                "probabilities": {id2label[i]: p for i, p in enumerate(mean)},
+            })
+        return results
+
+    def make_batches(self, lengths: List[int]):
+        """Groups indices of similar length so each batch stays within the size and padded-token budget."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches = []
+        current = []
+        longest = 0
+
+        for i in order:
+            candidate_longest = max(longest, lengths[i])
+            too_many = len(current) >= self.max_batch_size
+            too_long = candidate_longest * (len(current) + 1) > self.max_batch_tokens
+            if current and (too_many or too_long):
+                batches.append(current)
+                current = []
+                candidate_longest = lengths[i]
+            current.append(i)
+            longest = candidate_longest
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def split_into_windows(self, text, max_length=512):
+        """Tokenizes text once and returns overlapping windows of token IDs, each wrapped in special tokens."""
+        input_ids = self.tokenizer(text, add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+        body_length = max_length - self.tokenizer.num_special_tokens_to_add()
+        step = max(body_length - self.stride, 1)
 
-        chunks = []
-        for i in range(0, len(input_ids), max_length):
-            chunk_ids = input_ids[i : i + max_length]
-            chunk_text = self.tokenizer.decode(chunk_ids, skip_special_tokens=True)
-            chunks.append(chunk_text)
+        windows = []
+        start = 0
+        while True:
+            chunk_ids = input_ids[start : start + body_length]
+            windows.append(self.tokenizer.build_inputs_with_special_tokens(chunk_ids))
+            if start + body_length >= len(input_ids):
+                break
+            start += step
 
-        return chunks
+        return windows
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def normalize_text(text):
+    """Normalizes unicode and whitespace so trivially different copies of a headline share a key."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(model_id, text):
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model_id}:{digest}"
+
+
+class SentimentCache:
+    """Sentiment results keyed on (model id, normalized text hash), with an in-memory LRU and an optional SQLite tier."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self.reopen()
+
+    def reopen(self):
+        """(Re)connects the SQLite tier; forked workers call this rather than reuse the parent's handle."""
+        if not self.db_path:
+            return
+        with self._lock:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS sentiment_cache (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            self._db.commit()
+
+    def get(self, model_id, text):
+        key = cache_key(model_id, text)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return result
+
+            if self._db is not None:
+                row = self._db.execute("SELECT result FROM sentiment_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def put(self, model_id, text, result):
+        key = cache_key(model_id, text)
+        with self._lock:
+            self._remember(key, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sentiment_cache (key, result) VALUES (?, ?)", (key, json.dumps(result))
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sentiment_cache")
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+sentiment_cache = SentimentCache(
+    max_entries=int(os.getenv("SENTIMENT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+    db_path=os.getenv("SENTIMENT_CACHE_DB"),
+)
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+LABELS = ("positive", "negative", "neutral")
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_HALFLIFE_HOURS = 24
+MIN_CORRELATION_DAYS = 5
+
+
+def probability_matrix(results):
+    """
+    Stacks model results into an (n, 3) array of probabilities in LABELS order. Results without
+    stored probabilities (scored before they were kept) are rebuilt from their label and score,
+    with the remainder split evenly between the other labels.
+    """
+    matrix = np.empty((len(results), len(LABELS)))
+    for row, result in enumerate(results):
+        probabilities = result.get("probabilities")
+        if probabilities:
+            matrix[row] = [probabilities.get(label, 0.0) for label in LABELS]
+        else:
+            rest = (1.0 - result["score"]) / (len(LABELS) - 1)
+            matrix[row] = [result["score"] if label == result["label"] else rest for label in LABELS]
+    return matrix
+
+
+def summarize(probabilities):
+    """
+    Aggregates an (n, 3) probability matrix into one ticker-level score. Sentiment is
+    P(positive) - P(negative) in [-1, 1]; the weighted mean counts each article by the
+    model's confidence in its top label.
+    """
+    count = len(probabilities)
+    if not count:
+        return {"articles": 0, "label": None, "mean_sentiment": None, "weighted_sentiment": None,
+                "mean_confidence": None, "label_distribution": {label: 0.0 for label in LABELS}}
+
+    polarity = probabilities[:, 0] - probabilities[:, 1]
+    confidence = probabilities.max(axis=1)
+    counts = np.bincount(probabilities.argmax(axis=1), minlength=len(LABELS))
+    weighted_probabilities = confidence @ probabilities / confidence.sum()
+
+    return {
+        "articles": count,
+        "label": LABELS[int(weighted_probabilities.argmax())],
+        "mean_sentiment": round(float(polarity.mean()), 4),
+        "weighted_sentiment": round(float(confidence @ polarity / confidence.sum()), 4),
+        "mean_confidence": round(float(confidence.mean()), 4),
+        "label_distribution": {label: round(float(counts[i] / count), 4) for i, label in enumerate(LABELS)},
+    }
+
+
+def records_frame(records):
+    """Builds a time-indexed frame of polarity, confidence and top label from scored NewsRecords."""
+    scored = [record for record in records if record.sentiment_label is not None]
+    probabilities = probability_matrix([
+        {"label": r.sentiment_label, "score": r.sentiment_score, "probabilities": r.sentiment_probabilities}
+        for r in scored
+    ])
+    frame = pd.DataFrame(
+        {
+            "polarity": probabilities[:, 0] - probabilities[:, 1],
+            "confidence": probabilities.max(axis=1),
+            "label": [LABELS[i] for i in probabilities.argmax(axis=1)],
+        },
+        index=pd.DatetimeIndex([record.published_at for record in scored], name="published_at"),
+    )
+    return frame.sort_index(kind="stable"), probabilities
+
+
+def decayed_sentiment(frame, halflife=timedelta(hours=DEFAULT_HALFLIFE_HOURS)):
+    """Confidence-weighted sentiment with exponential time decay, evaluated at every article."""
+    weighted = (frame["polarity"] * frame["confidence"]).ewm(halflife=halflife, times=frame.index).mean()
+    weights = frame["confidence"].ewm(halflife=halflife, times=frame.index).mean()
+    return weighted / weights
+
+
+def daily_series(frame, rollups=(), halflife=timedelta(hours=DEFAULT_HALFLIFE_HOURS)):
+    """
+    Resamples article-level sentiment to one row per day, merged with the store's daily roll-ups
+    of expired headlines. A day's counts add up both sources; roll-up articles enter the sentiment
+    with their label's polarity and full confidence. Days with neither articles nor a roll-up are
+    left out.
+    """
+    columns = ["articles", "positive", "negative", "neutral", "sentiment", "decayed_sentiment"]
+    counts = ["articles", *LABELS, "weighted", "confidence"]
+    parts = []
+    decayed = None
+
+    if not frame.empty:
+        raw = pd.get_dummies(frame["label"]).reindex(columns=list(LABELS), fill_value=0).astype(int)
+        raw["weighted"] = frame["polarity"] * frame["confidence"]
+        raw["confidence"] = frame["confidence"]
+        raw = raw.resample("D").sum()
+        raw["articles"] = raw[list(LABELS)].sum(axis=1)
+        parts.append(raw[raw["articles"] > 0])
+        decayed = decayed_sentiment(frame, halflife).resample("D").last()
+
+    if rollups:
+        rolled = pd.DataFrame(rollups)
+        rolled.index = pd.DatetimeIndex(pd.to_datetime(rolled["day"]))
+        rolled["weighted"] = rolled["positive"] - rolled["negative"]
+        rolled["confidence"] = rolled["scored"]
+        parts.append(rolled)
+
+    if not parts:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="day"), dtype=float)
+
+    daily = pd.concat([part[counts] for part in parts]).groupby(level=0).sum()
+    daily.index.name = "day"
+    daily["sentiment"] = daily["weighted"] / daily["confidence"].replace(0, np.nan)
+    daily["decayed_sentiment"] = decayed.reindex(daily.index) if decayed is not None else np.nan
+    return daily[columns]
+
+
+def join_closes(daily, history):
+    """Adds close and daily return columns from a [(date, close)] price history."""
+    closes = pd.Series(
+        [close for _day, close in history],
+        index=pd.DatetimeIndex([day for day, _close in history], name="day").normalize(),
+        name="close",
+        dtype=float,
+    )
+    joined = daily.join(closes, how="outer")
+    joined["return"] = joined["close"].pct_change(fill_method=None)
+    return joined
+
+
+def next_day_correlation(joined):
+    """Correlation between a day's sentiment and the following trading day's return, when enough days overlap."""
+    pairs = pd.DataFrame({
+        "sentiment": joined["sentiment"],
+        "next_return": joined["return"].shift(-1),
+    }).dropna()
+    if len(pairs) < MIN_CORRELATION_DAYS:
+        return None
+    correlation = pairs["sentiment"].corr(pairs["next_return"])
+    return None if np.isnan(correlation) else round(float(correlation), 4)
+
+
+def _rows(frame):
+    frame = frame.round(4).astype(object).where(frame.notna(), None)
+    return [{"day": day.date().isoformat(), **row} for day, row in zip(frame.index, frame.to_dict("records"))]
+
+
+def ticker_signals(records, history=(), rollups=(), halflife=timedelta(hours=DEFAULT_HALFLIFE_HOURS)):
+    """Summary, decayed sentiment and a daily series joined with closes for one ticker."""
+    frame, probabilities = records_frame(records)
+    daily = daily_series(frame, rollups, halflife)
+    joined = join_closes(daily, history) if history else daily
+
+    decayed = decayed_sentiment(frame, halflife) if not frame.empty else None
+    return {
+        "summary": summarize(probabilities),
+        "decayed_sentiment": round(float(decayed.iloc[-1]), 4) if decayed is not None else None,
+        "next_day_return_correlation": next_day_correlation(joined) if history else None,
+        "series": _rows(joined),
+    }
+
+
+def compute_signals(symbols, store, market_data, days=DEFAULT_WINDOW_DAYS, halflife_hours=DEFAULT_HALFLIFE_HOURS):
+    """Returns {symbol: signals} for stored, scored news over the last `days`, with one bulk price fetch."""
+    since = datetime.now() - timedelta(days=days)
+    histories = market_data.get_histories(symbols, days=days)
+    halflife = timedelta(hours=halflife_hours)
+    return {
+        symbol: ticker_signals(
+            store.query(ticker=symbol, since=since),
+            history=histories.get(symbol) or (),
+            rollups=store.daily_sentiment(symbol, since=since),
+            halflife=halflife,
+        )
+        for symbol in symbols
+    }
@@ -0,0 +1,14 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Module-level stores open their SQLite files on import; keep them out of the working tree
+_data_dir = tempfile.mkdtemp(prefix="sap-stock-tests-")
+atexit.register(shutil.rmtree, _data_dir, ignore_errors=True)
+os.environ.setdefault("NEWS_STORE_DB", os.path.join(_data_dir, "news_store.sqlite3"))
+os.environ.setdefault("MARKET_DATA_DB", os.path.join(_data_dir, "market_data.sqlite3"))
@@ -0,0 +1,68 @@
+import json
+import types
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("psutil")
+
+import app as app_module
+from metrics import timer
+
+
+def fake_bot(tokens, error=None):
+    def stream_query_rag(question, ticker=None, since=None):
+        yield from tokens
+        if error is not None:
+            raise error
+
+    return types.SimpleNamespace(stream_query_rag=stream_query_rag)
+
+
+def sse_events(body):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_chatbot_stream_sends_tokens_then_done(client, monkeypatch):
+    monkeypatch.setitem(app_module.sys.modules, "bot", fake_bot(["Shares ", "rose."]))
+
+    response = client.post("/api/chatbot/stream", json={"question": "AAPL?"})
+    events = sse_events(response.get_data(as_text=True))
+
+    assert [data for event, data in events if event == "message"] == [{"token": "Shares "}, {"token": "rose."}]
+    assert events[-1] == ("done", {})
+
+
+def test_chatbot_stream_reports_failure_as_error_event_without_done(client, monkeypatch):
+    monkeypatch.setitem(app_module.sys.modules, "bot", fake_bot(["Shares "], error=RuntimeError("llm down")))
+
+    response = client.post("/api/chatbot/stream", json={"question": "AAPL?"})
+    events = sse_events(response.get_data(as_text=True))
+
+    assert events[0] == ("message", {"token": "Shares "})
+    assert events[-1][0] == "error"
+    assert "done" not in [event for event, _ in events]
+
+
+def test_profiled_chatbot_stream_sends_timing_before_done(client, monkeypatch):
+    def stream_query_rag(question, ticker=None, since=None):
+        with timer("llm"):
+            yield "Shares rose."
+
+    monkeypatch.setitem(app_module.sys.modules, "bot", types.SimpleNamespace(stream_query_rag=stream_query_rag))
+
+    response = client.post("/api/chatbot/stream", json={"question": "AAPL?"}, headers={"X-Profile": "1"})
+    events = sse_events(response.get_data(as_text=True))
+
+    assert [event for event, _ in events] == ["message", "timing", "done"]
+    assert events[1][1]["server_timing"].startswith("llm;dur=")
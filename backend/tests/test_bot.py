@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("langchain_google_genai")
+
+import bot
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "CHROMA_DIRECTORY", str(tmp_path / "chroma"))
+    monkeypatch.setattr(bot, "INDEX_VERSION_FILE", str(tmp_path / "chroma" / "index_version"))
+    service = bot.RagService.offline(responses=["first answer", "second answer"])
+    yield service
+    service.shutdown()
+
+
+def test_clients_are_created_once_and_reused(service):
+    assert service.query("What about AAPL?") == "first answer"
+    db, llm = service.db, service._llm
+
+    assert service.query("What about MSFT?") == "second answer"
+    assert service.db is db and service._llm is llm
+
+
+def test_repeated_question_is_answered_from_the_cache(service):
+    service.query("What about AAPL?")
+
+    assert service.query("what about  aapl") == "first answer"
+    assert service.cache_stats()["answers"]["exact_hits"] == 1
+
+
+def test_new_index_version_invalidates_cached_answers(service):
+    service.query("What about AAPL?")
+    bot.bump_index_version()
+
+    assert service.query("What about AAPL?") == "second answer"
+
+
+def test_stream_yields_the_answer_and_caches_it(service):
+    assert "".join(service.stream("What about AAPL?")) == "first answer"
+    assert service.query("What about AAPL?") == "first answer"
+
+
+def test_shutdown_drops_the_store_and_reopens_lazily(service):
+    service.query("What about AAPL?")
+    service.shutdown()
+
+    assert service._db is None
+    assert service.query("What about MSFT?") == "second answer"
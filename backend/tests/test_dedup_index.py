@@ -0,0 +1,45 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from dedup_index import HeadlineIndex, headline_hash
+
+
+def test_is_new_does_not_record(tmp_path):
+    index = HeadlineIndex(str(tmp_path / "index.sqlite3"))
+
+    assert index.is_new("AAPL", "headline")
+    assert index.is_new("AAPL", "headline")
+
+
+def test_mark_seen_persists(tmp_path):
+    db_path = str(tmp_path / "index.sqlite3")
+    HeadlineIndex(db_path).mark_seen("AAPL", ["headline"])
+
+    index = HeadlineIndex(db_path)
+    assert not index.is_new("AAPL", "headline")
+    assert index.is_new("MSFT", "headline")
+
+
+def test_prune_forgets_old_hashes(tmp_path):
+    db_path = str(tmp_path / "index.sqlite3")
+    index = HeadlineIndex(db_path)
+    index.mark_seen("AAPL", ["old"], now=datetime(2024, 1, 1))
+    index.mark_seen("AAPL", ["recent"], now=datetime(2024, 3, 1))
+
+    assert index.prune("AAPL", datetime(2024, 2, 1)) == 1
+    assert index.is_new("AAPL", "old")
+    assert not index.is_new("AAPL", "recent")
+    assert HeadlineIndex(db_path).is_new("AAPL", "old")
+
+
+def test_existing_index_gains_seen_at(tmp_path):
+    db_path = str(tmp_path / "index.sqlite3")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE headline_hashes (ticker TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (ticker, hash))")
+    legacy.execute("INSERT INTO headline_hashes VALUES ('AAPL', ?)", (headline_hash("old"),))
+    legacy.commit()
+    legacy.close()
+
+    index = HeadlineIndex(db_path)
+    assert index.prune("AAPL", datetime.now() - timedelta(days=1)) == 0
+    assert not index.is_new("AAPL", "old")
@@ -0,0 +1,47 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", 1.0))
+HEAVY_MODULES = ("torch", "transformers", "chromadb", "yfinance")
+
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+seconds = time.perf_counter() - started
+heavy = sorted(
+    name for name in sys.modules
+    if name.split(".")[0] in {heavy!r} or name.startswith("langchain")
+)
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+"""
+
+
+@pytest.mark.skipif(
+    any(importlib.util.find_spec(name) is None for name in ("flask", "flask_cors", "psutil")),
+    reason="app dependencies are not installed",
+)
+def test_import_app_is_fast_and_skips_heavy_subsystems(tmp_path):
+    # Without the test database overrides the stores would default to files in the working directory
+    unset = {"NEWS_API_KEY", "NEWS_STORE_DB", "MARKET_DATA_DB", "SENTIMENT_CACHE_DB"}
+    env = {key: value for key, value in os.environ.items() if key not in unset}
+    env.update({"SENTIMENT_WARM_UP": "0", "PYTHONPATH": BACKEND_DIR})
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(heavy=HEAVY_MODULES)],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert measured["heavy"] == []
+    assert list(tmp_path.glob("*.sqlite3*")) == []
+    assert measured["seconds"] < IMPORT_BUDGET_SECONDS, f"import app took {measured['seconds']:.3f}s"
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import sentiment_analysis
+from inference_backends import compare_backends
+from sentiment_analysis import SentimentAnalysis
+from test_sentiment_analysis import FakeRegistry
+
+TEXTS = ["up", "down"]
+
+
+class FixedBackend:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def predict(self, batch_ids, pad_token_id):
+        return self.rows[: len(batch_ids)]
+
+
+def test_compare_backends_passes_within_tolerance():
+    reference = FixedBackend([[0.1, 0.1, 0.8], [0.7, 0.2, 0.1]])
+    candidate = FixedBackend([[0.12, 0.1, 0.78], [0.69, 0.21, 0.1]])
+
+    report = compare_backends(TEXTS, [[1, 2], [1, 3]], 0, reference, candidate)
+
+    assert report["passed"]
+    assert report["label_mismatches"] == []
+    assert report["max_score_diff"] == pytest.approx(0.02)
+
+
+def test_compare_backends_reports_label_flips():
+    reference = FixedBackend([[0.1, 0.1, 0.8], [0.7, 0.2, 0.1]])
+    candidate = FixedBackend([[0.1, 0.1, 0.8], [0.2, 0.7, 0.1]])
+
+    report = compare_backends(TEXTS, [[1, 2], [1, 3]], 0, reference, candidate)
+
+    assert not report["passed"]
+    assert report["label_mismatches"] == ["down"]
+
+
+def test_cache_key_includes_backend_precision(monkeypatch):
+    registry = FakeRegistry()
+    monkeypatch.setattr(sentiment_analysis, "registry", registry)
+    fp32_id = SentimentAnalysis([], cache=None).model_id
+
+    registry.model.backend.precision = "int8"
+    int8_id = SentimentAnalysis([], cache=None).model_id
+
+    assert fp32_id != int8_id
+    assert int8_id.endswith(":int8")
+
+
+@pytest.mark.skipif(not os.getenv("SENTIMENT_PARITY_ONNX"), reason="set SENTIMENT_PARITY_ONNX to an exported model")
+def test_onnx_export_matches_torch():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("torch")
+    from inference_backends import check_parity
+
+    report = check_parity(
+        [
+            "Shares surge after record quarterly earnings beat expectations.",
+            "The company warned of layoffs as revenue fell sharply.",
+            "The board will meet on Tuesday.",
+        ],
+        os.environ["SENTIMENT_PARITY_ONNX"],
+    )
+    assert report["passed"], report
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from inference_server import InferenceServer
+from metrics import finish_profile, start_profile, timer
+
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+    release = threading.Event()
+
+    def score(texts):
+        release.wait(5)
+        batches.append(list(texts))
+        return [{"label": "neutral", "score": len(text)} for text in texts]
+
+    server = InferenceServer(score_fn=score, max_batch_size=64, max_wait_ms=200)
+    results = {}
+
+    def call(name, texts):
+        results[name] = server.submit(texts)
+
+    threads = [threading.Thread(target=call, args=(f"r{i}", [f"text-{i}", f"t{i}"])) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    server.stop()
+
+    assert sum(len(batch) for batch in batches) == 8
+    assert len(batches) < 4
+    for i in range(4):
+        assert [result["score"] for result in results[f"r{i}"]] == [len(f"text-{i}"), len(f"t{i}")]
+
+
+def test_errors_reach_every_waiting_caller():
+    def fail(texts):
+        raise RuntimeError("model crashed")
+
+    server = InferenceServer(score_fn=fail, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        server.submit(["text"])
+    server.stop()
+
+
+def test_empty_submit_skips_the_model():
+    server = InferenceServer(score_fn=lambda texts: pytest.fail("should not be called"))
+    assert server.submit([]) == []
+
+
+def test_batch_timings_reach_every_waiting_request_profile():
+    release = threading.Event()
+
+    def score(texts):
+        release.wait(5)
+        with timer("inference"):
+            return [{"label": "neutral", "score": 0.5} for _ in texts]
+
+    server = InferenceServer(score_fn=score, max_batch_size=64, max_wait_ms=200)
+    profiles = {}
+
+    def call(name, profiled):
+        token = start_profile() if profiled else None
+        server.submit([name])
+        if token is not None:
+            profiles[name] = finish_profile(token)
+
+    threads = [threading.Thread(target=call, args=(f"r{i}", i != 2)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    server.stop()
+
+    assert sorted(profiles) == ["r0", "r1"]
+    for profile in profiles.values():
+        assert {"inference", "inference_wait"} <= set(profile.stages)
@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+
+from market_data import MarketDataCache
+
+
+class FakeSource:
+    def __init__(self):
+        self.quote_calls = 0
+
+    def fetch_quote(self, symbol):
+        self.quote_calls += 1
+        return {"regularMarketOpen": 10.0, "longName": f"{symbol} Inc."}
+
+    def fetch_quotes(self, symbols):
+        return {symbol: {"regularMarketOpen": 11.0} for symbol in symbols}
+
+
+def test_bulk_quotes_do_not_replace_full_quotes(tmp_path):
+    source = FakeSource()
+    cache = MarketDataCache(source=source, db_path=str(tmp_path / "bars.sqlite3"))
+
+    assert cache.get_quotes(["AAPL"]) == {"AAPL": {"regularMarketOpen": 11.0}}
+    assert cache.get_quote("AAPL")["longName"] == "AAPL Inc."
+
+
+def test_bulk_quotes_reuse_cached_full_quotes(tmp_path):
+    source = FakeSource()
+    cache = MarketDataCache(source=source, db_path=str(tmp_path / "bars.sqlite3"))
+
+    cache.get_quote("AAPL")
+    assert cache.get_quotes(["AAPL"])["AAPL"]["longName"] == "AAPL Inc."
+    assert source.quote_calls == 1
+
+
+def bar(day, close):
+    return {"date": day, "open": close, "high": close, "low": close, "close": close, "volume": 100}
+
+
+class FakeBarSource:
+    def __init__(self, bars):
+        self.bars = bars
+        self.history_starts = []
+        self.bulk_calls = []
+
+    def fetch_history(self, symbol, start=None):
+        self.history_starts.append(start)
+        return [b for b in self.bars.get(symbol, []) if start is None or b["date"] >= start.isoformat()]
+
+    def fetch_histories(self, symbols, start=None):
+        self.bulk_calls.append((list(symbols), start))
+        return {symbol: self.fetch_history(symbol, start) for symbol in symbols}
+
+
+def recent_days(count):
+    today = date.today()
+    return [(today - timedelta(days=offset)).isoformat() for offset in range(count - 1, -1, -1)]
+
+
+def test_history_sync_only_fetches_after_last_stored_bar(tmp_path):
+    days = recent_days(3)
+    source = FakeBarSource({"AAPL": [bar(day, 100 + i) for i, day in enumerate(days)]})
+    cache = MarketDataCache(source=source, db_path=str(tmp_path / "bars.sqlite3"), bars_ttl_seconds=0)
+
+    assert [close for _day, close in cache.get_history("AAPL")] == [100, 101, 102]
+    assert [close for _day, close in cache.get_history("AAPL")] == [100, 101, 102]
+    assert source.history_starts[0] is None
+    assert source.history_starts[1] == date.fromisoformat(days[-1])
+
+
+def test_history_is_not_refetched_within_ttl(tmp_path):
+    source = FakeBarSource({"AAPL": [bar(day, 1) for day in recent_days(2)]})
+    cache = MarketDataCache(source=source, db_path=str(tmp_path / "bars.sqlite3"))
+
+    cache.get_history("AAPL")
+    cache.get_history("AAPL")
+    assert len(source.history_starts) == 1
+
+
+def test_histories_sync_stale_symbols_in_one_bulk_call(tmp_path):
+    days = recent_days(2)
+    source = FakeBarSource({"AAPL": [bar(day, 1) for day in days], "MSFT": [bar(day, 2) for day in days]})
+    cache = MarketDataCache(source=source, db_path=str(tmp_path / "bars.sqlite3"))
+
+    histories = cache.get_histories(["AAPL", "MSFT"])
+    cache.get_histories(["AAPL", "MSFT"])
+
+    assert source.bulk_calls == [(["AAPL", "MSFT"], None)]
+    assert [close for _day, close in histories["MSFT"]] == [2, 2]
@@ -0,0 +1,46 @@
+import threading
+
+from model_registry import ModelRegistry
+
+
+class FakeLoaded:
+    def __init__(self, name):
+        self.name = name
+        self.predictions = 0
+        self.tokenizer = lambda text: {"input_ids": [0, 1, 2]}
+
+    def predict(self, batch_ids):
+        self.predictions += 1
+        return [[1.0, 0.0, 0.0] for _ in batch_ids]
+
+
+def test_concurrent_get_loads_once(monkeypatch):
+    registry = ModelRegistry(backend="torch")
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return FakeLoaded(name)
+
+    monkeypatch.setattr(registry, "_load", load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["model"]
+    assert all(result is results[0] for result in results)
+
+
+def test_warm_up_marks_model_warm(monkeypatch):
+    registry = ModelRegistry(backend="torch")
+    monkeypatch.setattr(registry, "_load", FakeLoaded)
+
+    registry.get("model")
+    assert registry.is_loaded("model") and not registry.is_warm("model")
+
+    loaded = registry.warm_up("model")
+    assert registry.is_warm("model")
+    assert loaded.predictions == 1
@@ -0,0 +1,38 @@
+import threading
+
+from news_fetcher import NewsFetcher
+
+
+class FakeNewsApi:
+    def __init__(self, fail_for=()):
+        self.calls = []
+        self.fail_for = set(fail_for)
+        self._lock = threading.Lock()
+
+    def get_everything(self, q, language, sort_by, page_size):
+        with self._lock:
+            self.calls.append((q, sort_by))
+        if q in self.fail_for:
+            raise RuntimeError(f"failed {q}")
+        return {"articles": [{"title": f"{q} {sort_by}"}]}
+
+
+def test_fetch_many_runs_each_sort_order_and_caches():
+    client = FakeNewsApi()
+    fetcher = NewsFetcher(client, ttl_seconds=60)
+
+    first = fetcher.fetch_many("AAPL", ["publishedAt", "relevancy"])
+    second = fetcher.fetch_many("AAPL", ["publishedAt", "relevancy"])
+
+    assert [response["articles"][0]["title"] for response in first] == ["AAPL publishedAt", "AAPL relevancy"]
+    assert second == first
+    assert sorted(client.calls) == [("AAPL", "publishedAt"), ("AAPL", "relevancy")]
+
+
+def test_fetch_symbols_returns_errors_per_symbol():
+    fetcher = NewsFetcher(FakeNewsApi(fail_for={"BAD"}), ttl_seconds=60)
+
+    results = fetcher.fetch_symbols(["AAPL", "BAD"], ["publishedAt"])
+
+    assert results["AAPL"][0]["articles"][0]["title"] == "AAPL publishedAt"
+    assert isinstance(results["BAD"][0], RuntimeError)
@@ -0,0 +1,99 @@
+import pytest
+
+pytest.importorskip("bs4")
+
+import periodic_scraper
+from dedup_index import HeadlineIndex
+from news_store import NewsStore
+
+PAGE = b"""
+<table id="news-table">
+  <tr><td>Oct-10-24 12:20PM</td><td><a href="/news/1">Apple beats estimates</a></td></tr>
+</table>
+"""
+
+
+class FailingStore(NewsStore):
+    def add(self, records):
+        raise RuntimeError("disk full")
+
+
+def test_failed_insert_is_retried_on_next_run(tmp_path, monkeypatch):
+    store = FailingStore(str(tmp_path / "news.sqlite3"))
+    monkeypatch.setattr(periodic_scraper, "tickers", ["AAPL"])
+    monkeypatch.setattr(periodic_scraper, "news_store", store)
+    monkeypatch.setattr(periodic_scraper, "headline_index", HeadlineIndex(str(tmp_path / "index.sqlite3")))
+    monkeypatch.setattr(periodic_scraper, "fetch_ticker_page", lambda ticker: PAGE)
+
+    periodic_scraper.scrape_stock_news()
+
+    monkeypatch.setattr(store, "add", lambda records: NewsStore.add(store, records))
+    periodic_scraper.scrape_stock_news()
+
+    assert [record.headline for record in store.query(ticker="AAPL")] == ["Apple beats estimates"]
+
+
+class FakeResponse:
+    def __init__(self, body, headers):
+        self.body = body
+        self.headers = headers
+
+    def read(self):
+        return self.body
+
+
+class FakeFinviz:
+    """Stands in for urlopen: answers 304 when the request's validators match, else the current body."""
+
+    def __init__(self, body, etag='"v1"', last_modified="Thu, 10 Oct 2024 12:00:00 GMT"):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+
+    def __call__(self, request, timeout=None):
+        self.requests.append(dict(request.header_items()))
+        if self.etag and request.get_header("If-none-match") == self.etag:
+            raise periodic_scraper.HTTPError(request.full_url, 304, "Not Modified", {}, None)
+        headers = {"ETag": self.etag, "Last-Modified": self.last_modified} if self.etag else {}
+        return FakeResponse(self.body, headers)
+
+
+@pytest.fixture
+def finviz(monkeypatch):
+    monkeypatch.setattr(periodic_scraper, "fetch_state", {})
+
+    def install(server):
+        monkeypatch.setattr(periodic_scraper, "urlopen", server)
+        return server
+
+    return install
+
+
+def test_not_modified_page_is_skipped(finviz):
+    server = finviz(FakeFinviz(PAGE))
+
+    assert periodic_scraper.fetch_ticker_page("AAPL") == PAGE
+    assert periodic_scraper.fetch_ticker_page("AAPL") is None
+    assert server.requests[1]["If-none-match"] == '"v1"'
+    assert server.requests[1]["If-modified-since"] == "Thu, 10 Oct 2024 12:00:00 GMT"
+
+
+def test_unchanged_body_without_validators_is_skipped(finviz):
+    server = finviz(FakeFinviz(PAGE, etag=None))
+
+    assert periodic_scraper.fetch_ticker_page("AAPL") == PAGE
+    assert periodic_scraper.fetch_ticker_page("AAPL") is None
+    server.body = PAGE + b"<!-- updated -->"
+    assert periodic_scraper.fetch_ticker_page("AAPL") == server.body
+    assert "If-none-match" not in server.requests[0]
+
+
+def test_other_http_errors_propagate(finviz):
+    def unavailable(request, timeout=None):
+        raise periodic_scraper.HTTPError(request.full_url, 503, "Service Unavailable", {}, None)
+
+    finviz(unavailable)
+
+    with pytest.raises(periodic_scraper.HTTPError):
+        periodic_scraper.fetch_ticker_page("AAPL")
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+import periodic_sentiment_analysis
+from news_store import NewsRecord, NewsStore
+
+
+class FakeSentimentAnalysis:
+    calls = []
+
+    def __init__(self, texts):
+        self.text = texts
+
+    def sentiment_analysis(self):
+        FakeSentimentAnalysis.calls.append(list(self.text))
+        return [
+            {"headline": text, "label": "positive", "score": 0.9, "probabilities": {"positive": 0.9}}
+            for text in self.text
+        ]
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    FakeSentimentAnalysis.calls = []
+    monkeypatch.setattr(periodic_sentiment_analysis, "SentimentAnalysis", FakeSentimentAnalysis)
+    return FakeSentimentAnalysis
+
+
+def add(store, *headlines):
+    return store.add([NewsRecord("AAPL", datetime(2024, 10, 10), "finviz", h, h) for h in headlines])
+
+
+def test_only_new_unscored_headlines_are_scored(tmp_path, scorer):
+    store = NewsStore(str(tmp_path / "news.sqlite3"))
+    add(store, "first", "second")
+
+    assert periodic_sentiment_analysis.analyze_ticker_news(store=store) == {"AAPL": 2}
+    assert periodic_sentiment_analysis.analyze_ticker_news(store=store) == {"AAPL": 0}
+
+    already_scored, _ = add(store, "scored by the pipeline", "third")
+    store.set_sentiment([(already_scored.id, "negative", 0.8, None)])
+
+    assert periodic_sentiment_analysis.analyze_ticker_news(store=store) == {"AAPL": 1}
+    assert [len(call) for call in scorer.calls] == [2, 1]
+    assert {r.headline: r.sentiment_label for r in store.query(ticker="AAPL")} == {
+        "first": "positive", "second": "positive", "scored by the pipeline": "negative", "third": "positive",
+    }
+
+
+def test_batches_advance_the_high_water_mark(tmp_path, scorer):
+    store = NewsStore(str(tmp_path / "news.sqlite3"))
+    records = add(store, "a", "b", "c")
+
+    assert periodic_sentiment_analysis.analyze_ticker_news(store=store, batch_size=2) == {"AAPL": 3}
+    assert [len(call) for call in scorer.calls] == [2, 1]
+    assert store.get_progress(periodic_sentiment_analysis.JOB_NAME, "AAPL") == records[-1].id
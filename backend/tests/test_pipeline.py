@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("bs4")
+
+import pipeline
+from dedup_index import HeadlineIndex
+from news_store import NewsRecord, NewsStore
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "headline_index", HeadlineIndex(str(tmp_path / "index.sqlite3")))
+    runner = pipeline.PipelineRunner(["AAPL"], store=NewsStore(str(tmp_path / "news.sqlite3")))
+    yield runner
+    runner.inference_pool.shutdown()
+
+
+def make_record(headline):
+    return NewsRecord("AAPL", datetime(2024, 10, 10, 12, 0), "finviz", "u", headline)
+
+
+def test_dedup_records_hashes_only_after_store(runner):
+    record = make_record("Apple beats estimates")
+
+    assert runner._dedup([record]) == [record]
+    assert runner._dedup([record]) == [record]
+
+    runner._store([record])
+    assert runner._dedup([make_record("Apple beats estimates")]) == []
+
+
+def test_failed_scoring_stores_records_unscored(runner, monkeypatch):
+    def fail(texts):
+        raise RuntimeError("out of memory")
+
+    monkeypatch.setattr(runner, "_score", fail)
+    record = make_record("Apple beats estimates")
+
+    runner._store(runner._sentiment([record]))
+
+    [stored] = runner.store.query(ticker="AAPL")
+    assert stored.headline == "Apple beats estimates"
+    assert stored.sentiment_label is None
+
+
+def test_stop_drains_queued_items():
+    processed = []
+    first = pipeline.Stage("first", lambda batch: batch)
+    second = pipeline.Stage("second", lambda batch: processed.extend(batch) or [])
+    first.downstream = second
+    for item in range(20):
+        first.put(item)
+
+    first.start()
+    second.start()
+    first.stop()
+    second.stop()
+
+    assert sorted(processed) == list(range(20))
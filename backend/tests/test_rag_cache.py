@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from rag_cache import AnswerCache
+
+
+def test_answers_are_cached_per_filters():
+    cache = AnswerCache()
+    cache.sync_version(1)
+    cache.put("What about AAPL?", ("AAPL", None), "up", version=1)
+
+    assert cache.get("what about aapl", ("AAPL", None)) == "up"
+    assert cache.get("what about aapl", ("MSFT", None)) is None
+
+
+def test_answer_built_on_an_older_index_is_not_stored_under_the_new_version():
+    cache = AnswerCache()
+    cache.sync_version(1)
+    # A concurrent query sees the re-ingested index before this one finishes.
+    cache.sync_version(2)
+    cache.put("What about AAPL?", ("AAPL", None), "stale", version=1)
+
+    assert cache.get("What about AAPL?", ("AAPL", None)) is None
+
+
+def test_version_change_clears_answers():
+    cache = AnswerCache()
+    cache.sync_version(1)
+    cache.put("What about AAPL?", ("AAPL", None), "up", version=1)
+    cache.sync_version(2)
+
+    assert cache.get("What about AAPL?", ("AAPL", None)) is None
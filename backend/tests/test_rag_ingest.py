@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("langchain_text_splitters")
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("langchain_google_genai")
+
+import rag_ingest
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def update(self, ids, metadatas):
+        for doc_id, metadata in zip(ids, metadatas):
+            self.store.metadatas[doc_id] = dict(metadata)
+        self.store.updates += len(ids)
+
+
+class FakeVectorStore:
+    """Keeps documents by ID; `embedded` counts how many documents were embedded."""
+
+    def __init__(self):
+        self.metadatas = {}
+        self.embedded = 0
+        self.updates = 0
+        self._collection = FakeCollection(self)
+
+    def get(self, where=None, include=()):
+        ids = [
+            doc_id for doc_id, metadata in self.metadatas.items()
+            if where is None or metadata.get("source") == where["source"]
+        ]
+        return {"ids": ids, "metadatas": [self.metadatas[doc_id] for doc_id in ids]}
+
+    def add_documents(self, documents, ids):
+        for doc, doc_id in zip(documents, ids):
+            self.metadatas[doc_id] = dict(doc.metadata)
+        self.embedded += len(ids)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.metadatas[doc_id]
+
+
+@pytest.fixture(autouse=True)
+def no_version_file(monkeypatch):
+    monkeypatch.setattr(rag_ingest, "bump_index_version", lambda: None)
+
+
+def test_repeated_chunks_get_one_document():
+    paragraph = "Shares rallied after earnings. " * 20
+    documents, ids = rag_ingest.chunk_news("\n\n".join([paragraph] * 3), "news.txt")
+
+    assert len(ids) == len(set(ids)) == len(documents) == 1
+
+
+def test_unchanged_chunks_get_a_newer_published_ts_without_reembedding():
+    db = FakeVectorStore()
+    text = "Shares rallied after earnings."
+    first = rag_ingest.chunk_news(text, "news.txt", published_at=datetime(2024, 1, 1))
+    second = rag_ingest.chunk_news(text, "news.txt", published_at=datetime(2024, 2, 1))
+
+    assert rag_ingest.ingest_documents(db, "news.txt", *first)["added"] == 1
+    counts = rag_ingest.ingest_documents(db, "news.txt", *second)
+
+    assert counts == {"added": 0, "updated": 1, "removed": 0, "unchanged": 0}
+    assert db.embedded == 1
+    [metadata] = db.metadatas.values()
+    assert metadata["published_ts"] == int(datetime(2024, 2, 1).timestamp())
+
+
+def test_identical_reingest_changes_nothing():
+    db = FakeVectorStore()
+    documents, ids = rag_ingest.chunk_news("Shares rallied.", "news.txt", published_at=datetime(2024, 1, 1))
+
+    rag_ingest.ingest_documents(db, "news.txt", documents, ids)
+    counts = rag_ingest.ingest_documents(db, "news.txt", documents, ids)
+
+    assert counts == {"added": 0, "updated": 0, "removed": 0, "unchanged": 1}
+    assert db.updates == 0
+
+
+def test_changed_source_adds_new_chunks_and_removes_stale_ones():
+    db = FakeVectorStore()
+    rag_ingest.ingest_documents(db, "news.txt", *rag_ingest.chunk_news("Old story.", "news.txt"))
+
+    counts = rag_ingest.ingest_documents(db, "news.txt", *rag_ingest.chunk_news("New story.", "news.txt"))
+
+    assert (counts["added"], counts["removed"]) == (1, 1)
+    assert [metadata["content_hash"] for metadata in db.metadatas.values()] == [rag_ingest.content_hash("New story.")]
+
+
+def test_purge_removes_only_documents_without_a_source():
+    db = FakeVectorStore()
+    db.metadatas = {"legacy": {}, "tracked": {"source": "news.txt"}}
+
+    assert rag_ingest.purge_legacy_documents(db) == 1
+    assert list(db.metadatas) == ["tracked"]
@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from dedup_index import HeadlineIndex
+from news_store import NewsRecord, NewsStore
+from retention import RetentionManager, RetentionPolicy
+
+
+def make_store(tmp_path):
+    return NewsStore(str(tmp_path / "news.sqlite3"))
+
+
+def test_expire_rolls_up_unscored_days(tmp_path):
+    store = make_store(tmp_path)
+    now = datetime(2024, 10, 10, 12, 0)
+    store.add([
+        NewsRecord("AAPL", now - timedelta(days=days), "finviz", f"u{days}", f"headline {days}")
+        for days in range(40)
+    ])
+
+    removed = RetentionManager(store, RetentionPolicy(default=timedelta(days=30))).run_once(now=now)
+
+    assert removed == {"AAPL": 9}
+    rollups = store.daily_sentiment("AAPL")
+    assert len(rollups) == 9
+    assert all(day["scored"] == 0 and day["positive"] == 0 and day["mean_score"] is None for day in rollups)
+
+
+def test_expire_counts_scored_labels(tmp_path):
+    store = make_store(tmp_path)
+    old = datetime(2024, 1, 1, 9, 0)
+    records = store.add([
+        NewsRecord("AAPL", old, "finviz", "u1", "up"),
+        NewsRecord("AAPL", old, "finviz", "u2", "down"),
+        NewsRecord("AAPL", old, "finviz", "u3", "unscored"),
+    ])
+    store.set_sentiment([
+        (records[0].id, "positive", 0.9, None),
+        (records[1].id, "negative", 0.7, None),
+    ])
+
+    assert store.expire("AAPL", datetime(2024, 2, 1)) == 3
+    [day] = store.daily_sentiment("AAPL")
+    assert (day["articles"], day["scored"], day["positive"], day["negative"], day["neutral"]) == (3, 2, 1, 1, 0)
+    assert day["mean_score"] == 0.8
+
+
+def test_run_once_continues_after_unscored_ticker(tmp_path):
+    store = make_store(tmp_path)
+    now = datetime(2024, 10, 10, 12, 0)
+    old = now - timedelta(days=60)
+    store.add([NewsRecord(ticker, old, "finviz", "u", "old news") for ticker in ("AAPL", "MSFT")])
+
+    removed = RetentionManager(store).run_once(now=now)
+
+    assert removed == {"AAPL": 1, "MSFT": 1}
+
+
+def test_run_once_prunes_the_headline_index(tmp_path):
+    store = make_store(tmp_path)
+    index = HeadlineIndex(str(tmp_path / "index.sqlite3"))
+    now = datetime(2024, 10, 10, 12, 0)
+    index.mark_seen("AAPL", ["old"], now=now - timedelta(days=45))
+    index.mark_seen("AAPL", ["recent"], now=now - timedelta(days=1))
+
+    RetentionManager(store, RetentionPolicy(default=timedelta(days=30)), index=index).run_once(now=now)
+
+    assert index.is_new("AAPL", "old")
+    assert not index.is_new("AAPL", "recent")
+
+
+def test_existing_store_is_converted_to_incremental_auto_vacuum(tmp_path):
+    db_path = str(tmp_path / "news.sqlite3")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE legacy (x)")
+    legacy.commit()
+    legacy.close()
+
+    store = NewsStore(db_path)
+
+    assert store._connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("bs4")
+
+from aiohttp import web
+
+from scrape_engine import ScrapeEngine
+
+INTERVAL = 0.2
+
+
+class NewsSite:
+    """A local server that records when each path was requested; /broken answers 500."""
+
+    def __init__(self, article_host=None):
+        self.article_host = article_host
+        self.requests = []
+
+    async def handle(self, request):
+        self.requests.append((request.path, time.monotonic()))
+        if request.path.startswith("/broken"):
+            raise web.HTTPInternalServerError()
+        if request.path.startswith("/quote/"):
+            ticker = request.path.rsplit("/", 1)[-1]
+            host = self.article_host or ""
+            links = "".join(
+                f'<a class="tab-link-news" href="{host}/{path}">news</a>'
+                for path in (f"article/{ticker}", f"broken/{ticker}")
+            )
+            return web.Response(text=f"<html><body>{links}</body></html>", content_type="text/html")
+        return web.Response(
+            text=f"<html><title>{request.path}</title><body><p>Body of {request.path}</p></body></html>",
+            content_type="text/html",
+        )
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def gaps(times):
+    return [later - earlier for earlier, later in zip(times, times[1:])]
+
+
+def test_fetches_to_one_host_are_spaced_and_do_not_block_other_hosts():
+    async def run():
+        busy, other = await NewsSite().start(), await NewsSite().start()
+        engine = ScrapeEngine(busy.url + "/quote/", concurrency=1, host_interval=INTERVAL, browser_pool_size=0)
+        semaphore = asyncio.Semaphore(engine.concurrency)
+        try:
+            async with aiohttp.ClientSession() as session:
+                started = time.monotonic()
+                await asyncio.gather(
+                    *(engine.fetch(session, semaphore, f"{busy.url}/quote/T{i}") for i in range(3)),
+                    engine.fetch(session, semaphore, f"{other.url}/article/X"),
+                )
+        finally:
+            await busy.stop()
+            await other.stop()
+        return started, busy.requests, other.requests
+
+    started, busy_requests, other_requests = asyncio.run(run())
+
+    assert all(gap >= INTERVAL * 0.9 for gap in gaps([at for _path, at in busy_requests]))
+    # A single concurrency slot is never held while sleeping for the busy host's next slot
+    [(_path, other_at)] = other_requests
+    assert other_at - started < INTERVAL
+
+
+def test_scrape_keeps_failed_articles_empty_and_logs_them(caplog):
+    async def run():
+        articles = await NewsSite().start()
+        listing = await NewsSite(article_host=articles.url).start()
+        engine = ScrapeEngine(listing.url + "/quote/", host_interval=INTERVAL, browser_pool_size=0)
+        try:
+            return await engine.scrape(["AAPL", "MSFT"]), articles.requests
+        finally:
+            await listing.stop()
+            await articles.stop()
+
+    with caplog.at_level(logging.WARNING):
+        results, article_requests = asyncio.run(run())
+
+    by_link = {result["link"].split("/", 3)[-1]: result for result in results}
+    assert sorted(by_link) == ["article/AAPL", "article/MSFT", "broken/AAPL", "broken/MSFT"]
+    assert by_link["article/AAPL"]["content"] == ["Body of /article/AAPL"]
+    assert by_link["broken/MSFT"]["content"] == [] and by_link["broken/MSFT"]["title"] == ""
+    assert any("HTTP fetch failed" in message and "broken/MSFT" in message for message in caplog.messages)
+    assert all(gap >= INTERVAL * 0.9 for gap in gaps([at for _path, at in article_requests]))
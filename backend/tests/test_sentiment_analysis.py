@@ -0,0 +1,153 @@
+import pytest
+
+import sentiment_analysis
+from sentiment_analysis import SentimentAnalysis
+
+CLS, SEP, PAD = 1, 2, 0
+LABELS = {0: "negative", 1: "neutral", 2: "positive"}
+
+
+class FakeTokenizer:
+    """Maps each whitespace-separated word to one token ID, RoBERTa-style with two special tokens."""
+
+    model_max_length = 512
+    pad_token_id = PAD
+
+    def __call__(self, text, add_special_tokens=True, truncation=False, verbose=True):
+        ids = [10 + int(word) if word.isdigit() else 3 for word in text.split()]
+        return {"input_ids": self.build_inputs_with_special_tokens(ids) if add_special_tokens else ids}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [CLS, *ids, SEP]
+
+
+class FakeConfig:
+    id2label = LABELS
+
+
+class FakeBackend:
+    """Scores a window from its own tokens only, like a padding-aware model, and records batch shapes."""
+
+    name = "fake"
+    precision = "float32"
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch_ids, pad_token_id):
+        self.batches.append([len(ids) for ids in batch_ids])
+        rows = []
+        for ids in batch_ids:
+            positive = sum(1 for token in ids if token >= 10) / len(ids)
+            rows.append([1.0 - positive, 0.0, positive])
+        return rows
+
+
+class FakeModel:
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.config = FakeConfig()
+        self.backend = FakeBackend()
+
+    def predict(self, batch_ids):
+        return self.backend.predict(batch_ids, self.tokenizer.pad_token_id)
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.model = FakeModel()
+
+    def get(self, name):
+        return self.model
+
+
+@pytest.fixture
+def fake_registry(monkeypatch):
+    registry = FakeRegistry()
+    monkeypatch.setattr(sentiment_analysis, "registry", registry)
+    return registry
+
+
+def words(count, start=0):
+    return " ".join(str(i % 50) for i in range(start, start + count))
+
+
+def test_short_text_is_one_window(fake_registry):
+    analysis = SentimentAnalysis([], cache=None)
+
+    assert analysis.split_into_windows("1 2 3") == [[CLS, 11, 12, 13, SEP]]
+
+
+def test_long_text_windows_overlap_by_stride(fake_registry):
+    analysis = SentimentAnalysis([], cache=None, stride=64)
+    tokens = FakeTokenizer()(words(1000), add_special_tokens=False)["input_ids"]
+
+    windows = analysis.split_into_windows(words(1000), max_length=512)
+
+    bodies = [window[1:-1] for window in windows]
+    assert all(window[0] == CLS and window[-1] == SEP for window in windows)
+    assert all(len(window) <= 512 for window in windows)
+    assert [len(body) for body in bodies] == [510, 510, 108]
+    # Consecutive windows share exactly `stride` tokens and together cover the whole text
+    assert bodies[0][-64:] == bodies[1][:64]
+    assert bodies[1][-64:] == bodies[2][:64]
+    assert bodies[0] + bodies[1][64:] + bodies[2][64:] == tokens
+
+
+def test_aggregate_weights_windows_by_length(fake_registry):
+    analysis = SentimentAnalysis([], cache=None)
+    windows = [[CLS] + [3] * 8 + [SEP], [CLS, SEP]]
+    probabilities = [[0.2, 0.0, 0.8], [1.0, 0.0, 0.0]]
+
+    [result] = analysis.aggregate(windows, [0, 0], probabilities, 1)
+
+    assert result["label"] == "positive"
+    assert result["score"] == pytest.approx((0.8 * 10) / 12)
+    assert result["probabilities"]["negative"] == pytest.approx((0.2 * 10 + 1.0 * 2) / 12)
+
+
+def test_batched_scoring_matches_per_text_scoring(fake_registry):
+    texts = ["1 2 x", words(700), "x x x 4", words(1300, start=7), ""]
+
+    batched = SentimentAnalysis(texts, cache=None, batched=True).sentiment_analysis()
+    single = [SentimentAnalysis([text], cache=None, batched=False).sentiment_analysis()[0] for text in texts]
+
+    assert [r["label"] for r in batched] == [r["label"] for r in single]
+    for expected, actual in zip(single, batched):
+        assert actual["score"] == pytest.approx(expected["score"])
+
+
+def test_batches_respect_size_and_token_budget(fake_registry):
+    analysis = SentimentAnalysis([], cache=None, max_batch_size=4, max_batch_tokens=1000)
+    lengths = [10, 500, 12, 300, 11, 490, 9, 13]
+
+    batches = analysis.make_batches(lengths)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert max(lengths[i] for i in batch) * len(batch) <= 1000
+
+
+def test_torch_padded_batch_matches_single_rows():
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    from inference_backends import TorchBackend
+
+    torch.manual_seed(0)
+    config = transformers.RobertaConfig(
+        vocab_size=64, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=32, max_position_embeddings=80, num_labels=3, pad_token_id=PAD,
+    )
+    model = transformers.RobertaForSequenceClassification(config).eval()
+    backend = TorchBackend(model)
+    batch = [[CLS, 5, 6, 7, SEP], [CLS, 8, SEP], [CLS, *range(10, 40), SEP]]
+
+    padded = backend.predict(batch, PAD)
+    single = [backend.predict([ids], PAD)[0] for ids in batch]
+
+    for expected, actual in zip(single, padded):
+        assert actual == pytest.approx(expected, abs=1e-5)
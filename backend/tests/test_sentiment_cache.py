@@ -0,0 +1,43 @@
+from sentiment_cache import SentimentCache, cache_key
+
+MODEL = "model:torch"
+RESULT = {"label": "positive", "score": 0.9}
+
+
+def test_normalized_text_shares_a_key():
+    assert cache_key(MODEL, "Apple  beats\nestimates ") == cache_key(MODEL, "Apple beats estimates")
+    assert cache_key(MODEL, "Apple beats estimates") != cache_key("other:torch", "Apple beats estimates")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = SentimentCache(max_entries=2)
+    cache.put(MODEL, "a", RESULT)
+    cache.put(MODEL, "b", RESULT)
+    cache.get(MODEL, "a")
+    cache.put(MODEL, "c", RESULT)
+
+    assert cache.get(MODEL, "a") == RESULT
+    assert cache.get(MODEL, "b") is None
+    assert cache.get(MODEL, "c") == RESULT
+    assert cache.stats()["entries"] == 2
+
+
+def test_evicted_entries_fall_back_to_disk(tmp_path):
+    cache = SentimentCache(max_entries=1, db_path=str(tmp_path / "cache.sqlite3"))
+    cache.put(MODEL, "a", RESULT)
+    cache.put(MODEL, "b", {"label": "negative", "score": 0.7})
+
+    assert cache.get(MODEL, "a") == RESULT
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (0, 1, 0)
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite3")
+    SentimentCache(db_path=db_path).put(MODEL, "a", RESULT)
+
+    cache = SentimentCache(db_path=db_path)
+    assert cache.get(MODEL, "a") == RESULT
+    assert cache.get(MODEL, "a") == RESULT
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"]) == (1, 1)
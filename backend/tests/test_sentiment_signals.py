@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from sentiment_signals import daily_series, decayed_sentiment, join_closes, next_day_correlation
+
+
+def articles(*rows):
+    """Builds a records frame from (published_at, polarity, confidence, label) rows."""
+    return pd.DataFrame(
+        [{"polarity": polarity, "confidence": confidence, "label": label} for _at, polarity, confidence, label in rows],
+        index=pd.DatetimeIndex([at for at, *_ in rows], name="published_at"),
+    )
+
+
+def rollup(day, positive=0, negative=0, neutral=0, unscored=0):
+    scored = positive + negative + neutral
+    return {"day": day, "articles": scored + unscored, "scored": scored, "positive": positive,
+            "negative": negative, "neutral": neutral, "mean_score": None}
+
+
+def test_days_without_articles_are_dropped_and_rollups_fill_the_gap():
+    frame = articles(
+        (datetime(2024, 10, 1, 9), 0.8, 1.0, "positive"),
+        (datetime(2024, 10, 4, 9), -0.5, 1.0, "negative"),
+    )
+
+    daily = daily_series(frame, rollups=[rollup("2024-10-02", positive=1, negative=3)])
+
+    assert [day.date().isoformat() for day in daily.index] == ["2024-10-01", "2024-10-02", "2024-10-04"]
+    assert daily.loc["2024-10-02", "articles"] == 4
+    assert daily.loc["2024-10-02", "sentiment"] == pytest.approx(-0.5)
+    assert pd.isna(daily.loc["2024-10-02", "decayed_sentiment"])
+
+
+def test_partially_expired_day_merges_rollup_counts():
+    frame = articles(
+        (datetime(2024, 10, 1, 15), 0.6, 0.5, "positive"),
+        (datetime(2024, 10, 1, 16), -0.2, 0.5, "negative"),
+    )
+
+    [row] = daily_series(frame, rollups=[rollup("2024-10-01", positive=2, neutral=1, unscored=1)]).to_dict("records")
+
+    assert (row["articles"], row["positive"], row["negative"], row["neutral"]) == (6, 3, 1, 1)
+    # (0.6 * 0.5 - 0.2 * 0.5 + 2) / (0.5 + 0.5 + 3)
+    assert row["sentiment"] == pytest.approx(2.2 / 4.0)
+    assert not pd.isna(row["decayed_sentiment"])
+
+
+def test_unscored_rollup_has_no_sentiment():
+    daily = daily_series(articles(), rollups=[rollup("2024-10-01", unscored=2)])
+
+    assert daily["articles"].tolist() == [2]
+    assert pd.isna(daily["sentiment"].iloc[0])
+
+
+def test_decayed_sentiment_weights_recent_articles_more():
+    start = datetime(2024, 10, 1)
+    frame = articles((start, -1.0, 1.0, "negative"), (start + timedelta(hours=24), 1.0, 1.0, "positive"))
+
+    decayed = decayed_sentiment(frame, halflife=timedelta(hours=24))
+
+    # The older article's weight has halved: (-0.5 + 1) / (0.5 + 1)
+    assert decayed.iloc[0] == pytest.approx(-1.0)
+    assert decayed.iloc[-1] == pytest.approx(1 / 3)
+
+
+def test_next_day_correlation_pairs_sentiment_with_following_return():
+    days = pd.date_range("2024-10-01", periods=7, freq="D")
+    sentiment = [0.1, -0.2, 0.3, -0.4, 0.5, -0.6, 0.0]
+    daily = pd.DataFrame({"sentiment": sentiment}, index=pd.DatetimeIndex(days, name="day"))
+    closes = [100.0]
+    for value in sentiment[:-1]:
+        closes.append(closes[-1] * (1 + value / 10))
+
+    joined = join_closes(daily, list(zip(days.date, closes)))
+
+    assert next_day_correlation(joined) == pytest.approx(1.0)
+    assert next_day_correlation(joined.iloc[:4]) is None
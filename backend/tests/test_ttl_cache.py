@@ -0,0 +1,98 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ttl_cache, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(ttl_seconds=60)
+    cache.put("key", "value")
+
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+
+
+def test_expired_entry_is_reloaded(clock):
+    cache = TTLCache(ttl_seconds=60)
+    loads = []
+
+    def loader():
+        loads.append(clock.now)
+        return len(loads)
+
+    assert cache.get_or_load("key", loader) == 1
+    assert cache.get_or_load("key", loader) == 1
+    clock.now += 61
+    assert cache.get_or_load("key", loader) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl_seconds=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader))) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    while cache.stats()["coalesced"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 6
+    assert cache.stats()["coalesced"] == 5
+
+
+def test_load_errors_are_raised_and_not_cached():
+    cache = TTLCache(ttl_seconds=60)
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("key", fail)
+    assert cache.get_or_load("key", lambda: "value") == "value"
+
+
+def test_max_entries_evicts_oldest():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" and cache.get("c") == "c"
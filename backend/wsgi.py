@@ -0,0 +1,35 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the gunicorn master imports this module once, so the sentiment model's
+weights are loaded before the workers fork and shared copy-on-write. The master never runs
+the model: a forward pass would start torch's OpenMP thread pool, which does not survive a
+fork, so each worker runs its own warm-up prediction in after_fork. The news store and market
+data cache are opened on first use, which is always inside a worker.
+"""
+import gc
+import logging
+import os
+
+from app import app, load_models, warm_up_models
+from model_registry import registry
+from sentiment_cache import sentiment_cache
+
+load_models()
+# Move everything allocated so far out of the collector's reach, so GC passes in the
+# workers do not write to (and un-share) the pages holding it.
+gc.freeze()
+
+
+def after_fork():
+    """Gives a forked worker its own sentiment cache connection and torch thread pool, then warms the model."""
+    sentiment_cache.reopen()
+
+    threads = os.getenv("TORCH_THREADS_PER_WORKER")
+    if threads and registry.backend == "torch" and registry.is_loaded():
+        import torch
+
+        torch.set_num_threads(int(threads))
+        logging.info(f"Worker {os.getpid()} using {threads} torch threads")
+
+    warm_up_models()